@@ -1,12 +1,26 @@
 import streamlit as st
-import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 import hashlib
-import json
 import os
+import threading
+import time
+import uuid
 from pathlib import Path
-import secrets
-import string
+from storage import (atomic_write_json, cache_stats, cached, cached_json, file_lock, file_signature,
+                     get_record_store, read_json)
+from shortener import (add_codes, claim_code_use, code_status_counts, code_uses, delete_codes,
+                       ensure_code_index, lookup_code_status, mint_codes, set_code_status, sweep_expired,
+                       url_transaction)
+from grading import get_grade_info, grading_scale_frame
+from calculator import MAX_COURSES, MAX_SEMESTERS, build_record, calculate_cgpa, calculate_gpa
+from aggregates import stats_mean, stats_median
+from name_index import NAME_PAGE_SIZE, normalize_name
+from page_markup import APP_CSS, DEACTIVATED_HTML, EXPIRED_HTML, FOOTER_HTML, HEADER_HTML
+from url_history import get_history_log, migrate_url_history
+from access_stats import conversion_rate, get_access_counters, visits_by_hour
+from submissions import KeyedLimiter, get_write_queue
+from students import (canonical_key, duplicate_pairs, load_aliases, merge_students, student_directory,
+                      unmerge_student)
 
 # Page configuration
 st.set_page_config(
@@ -22,97 +36,198 @@ STUDENT_GPA_FILE = f"{DATA_DIR}/student_gpa_records.json"
 STUDENT_CGPA_FILE = f"{DATA_DIR}/student_cgpa_records.json"
 ADMIN_CONFIG_FILE = f"{DATA_DIR}/admin_config.json"
 URL_SHORTENER_FILE = f"{DATA_DIR}/url_shortener.json"
-
-# Create data directory if it doesn't exist
-Path(DATA_DIR).mkdir(exist_ok=True)
+SHORT_CODE_INDEX_FILE = f"{DATA_DIR}/short_code_index.json"
+SHORT_CODE_STATS_FILE = f"{DATA_DIR}/short_code_stats.json"
+STUDENT_ALIASES_FILE = f"{DATA_DIR}/student_aliases.json"
+URL_HISTORY_DIR = f"{DATA_DIR}/url_history"
+URL_HISTORY_PAGE_SIZE = 100
+CODE_SWEEP_INTERVAL_SECONDS = 300
+# Token buckets around the student save path: (tokens per second, burst)
+CODE_SAVE_LIMIT = (2.0, 120)
+SESSION_SAVE_LIMIT = (0.1, 5)
+EXPORT_DIR = f"{DATA_DIR}/exports"
 
 # Initialize admin configuration if not exists
 def init_admin_config():
-    if not os.path.exists(ADMIN_CONFIG_FILE):
-        default_config = {
-            "username": "admin",
-            "password_hash": hashlib.sha256("admin123".encode()).hexdigest()
-        }
-        with open(ADMIN_CONFIG_FILE, 'w') as f:
-            json.dump(default_config, f, indent=2)
+    with file_lock(ADMIN_CONFIG_FILE):
+        if not os.path.exists(ADMIN_CONFIG_FILE):
+            default_config = {
+                "username": "admin",
+                "password_hash": hashlib.sha256("admin123".encode()).hexdigest()
+            }
+            atomic_write_json(ADMIN_CONFIG_FILE, default_config)
 
 # Initialize URL shortener database
 def init_url_shortener():
-    if not os.path.exists(URL_SHORTENER_FILE):
-        default_data = {
-            "base_url": "https://smiumgpa.streamlit.app",
-            "short_codes": {},
-            "active_short_codes": [],
-            "url_history": []
-        }
-        with open(URL_SHORTENER_FILE, 'w') as f:
-            json.dump(default_data, f, indent=2)
+    with file_lock(URL_SHORTENER_FILE):
+        if not os.path.exists(URL_SHORTENER_FILE):
+            default_data = {
+                "base_url": "https://smiumgpa.streamlit.app",
+                "short_codes": {}
+            }
+            atomic_write_json(URL_SHORTENER_FILE, default_data)
+    ensure_code_index(URL_SHORTENER_FILE, SHORT_CODE_INDEX_FILE)
+    migrate_url_history(URL_SHORTENER_FILE, get_history_log(URL_HISTORY_DIR))
+
+# Append entries to the URL history (only its live segment is written)
+def log_url_history(*entries):
+    get_history_log(URL_HISTORY_DIR).append(entries)
 
-# Initialize student data files
+RECORD_FILES = (STUDENT_GPA_FILE, STUDENT_CGPA_FILE)
+
+# Initialize student data files (one-time migration to the record journal)
 def init_student_data():
-    for file_path in [STUDENT_GPA_FILE, STUDENT_CGPA_FILE]:
-        if not os.path.exists(file_path):
-            with open(file_path, 'w') as f:
-                json.dump([], f, indent=2)
+    for file_path in RECORD_FILES:
+        get_record_store(file_path).migrate()
 
 # Load data from JSON files
 def load_data(file_path):
-    try:
-        with open(file_path, 'r') as f:
-            return json.load(f)
-    except:
-        return []
+    if file_path in RECORD_FILES:
+        return get_record_store(file_path).load()
+    return read_json(file_path, [])
 
-# Save data to JSON files
+# Save data to JSON files (locked, atomic replace)
 def save_data(file_path, data):
-    with open(file_path, 'w') as f:
-        json.dump(data, f, indent=2)
+    if file_path in RECORD_FILES:
+        get_record_store(file_path).replace(data)
+        return
+    with file_lock(file_path):
+        atomic_write_json(file_path, data)
+
+# Append a single student record; concurrent appends are written as one batch
+def append_record(file_path, record):
+    get_write_queue(get_record_store(file_path)).submit(record)
+
+# Per short code and per session limiters, shared by all sessions of the process
+@st.cache_resource(show_spinner=False)
+def save_limiters():
+    return KeyedLimiter(*CODE_SAVE_LIMIT), KeyedLimiter(*SESSION_SAVE_LIMIT)
+
+# Save a student's result unless their session or short code is over its rate;
+# returns whether it was saved
+def save_submission(file_path, record):
+    code_limiter, session_limiter = save_limiters()
+    session_key = st.session_state.setdefault('session_key', uuid.uuid4().hex)
+    if not session_limiter.try_acquire(session_key):
+        return False
+    access_code = st.session_state.get('access_code')
+    if access_code and not code_limiter.try_acquire(access_code):
+        return False
+    append_record(file_path, record)
+    record_link_calculation()
+    return True
+
+# Count a finished calculation against the short code the student came in on
+# (in memory; flushed to disk in batches)
+def record_link_calculation():
+    access_code = st.session_state.get('access_code')
+    if access_code:
+        get_access_counters(SHORT_CODE_STATS_FILE).record_calculation(access_code)
 
 # Hash password
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
-# Generate random short code
-def generate_short_code(length=8):
-    alphabet = string.ascii_letters + string.digits
-    return ''.join(secrets.choice(alphabet) for _ in range(length))
+# Admin search modes -> name index modes
+SEARCH_MODES = {"Contains": "contains", "Starts with": "prefix", "Fuzzy": "fuzzy"}
+
+# Student picker fed one page at a time from the store's name index
+def select_student(store, search_term, search_mode, key):
+    names, total = store.search_names(search_term, search_mode, 0, NAME_PAGE_SIZE)
+    if total > NAME_PAGE_SIZE:
+        pages = -(-total // NAME_PAGE_SIZE)
+        page = st.number_input(f"Student List Page (of {pages}, {total:,} students)",
+                               min_value=1, max_value=pages, value=1, key=f"{key}_page")
+        if page > 1:
+            names, _ = store.search_names(search_term, search_mode,
+                                          (page - 1) * NAME_PAGE_SIZE, NAME_PAGE_SIZE)
+    return st.selectbox("Select Student for Individual Report", [""] + names, key=key)
+
+# Student directory and duplicate suggestions, rebuilt only when the records
+# or the aliases change
+def history_version(gpa_store, cgpa_store):
+    return (gpa_store.version(), cgpa_store.version(), file_signature(STUDENT_ALIASES_FILE))
+
+def history_directory(gpa_store, cgpa_store):
+    return cached((STUDENT_ALIASES_FILE, "directory"), history_version(gpa_store, cgpa_store),
+                  lambda: student_directory({'GPA': gpa_store.name_index(), 'CGPA': cgpa_store.name_index()},
+                                            load_aliases(STUDENT_ALIASES_FILE)))
+
+def history_duplicates(gpa_store, cgpa_store):
+    return cached((STUDENT_ALIASES_FILE, "duplicates"), history_version(gpa_store, cgpa_store),
+                  lambda: duplicate_pairs(history_directory(gpa_store, cgpa_store)))
+
+# Records table pagination
+PAGE_SIZES = [25, 50, 100]
+ORDERS = {"Newest / Highest First": True, "Oldest / Lowest First": False}
 
-# Initialize all files
-init_admin_config()
-init_url_shortener()
-init_student_data()
+# Sort and page-size controls; returns the current page from the store
+def records_page(store, key, search_term, search_mode, sort_columns):
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sort_label = st.selectbox("Sort By", list(sort_columns), key=f"{key}_sort")
+    with col2:
+        descending = ORDERS[st.selectbox("Order", list(ORDERS), key=f"{key}_order")]
+    with col3:
+        page_size = st.selectbox("Rows per Page", PAGE_SIZES, key=f"{key}_page_size")
+    
+    # Start over from the first page whenever the query changes
+    query = (search_term, search_mode, sort_label, descending, page_size)
+    if st.session_state.get(f"{key}_query") != query:
+        st.session_state[f"{key}_query"] = query
+        st.session_state[f"{key}_cursors"] = [None]
+    cursors = st.session_state[f"{key}_cursors"]
+    records, next_cursor, total = store.page(sort_columns[sort_label], descending, page_size,
+                                             cursors[-1], search_term, search_mode)
+    return records, next_cursor, total, page_size
 
-# Load configurations
-with open(ADMIN_CONFIG_FILE, 'r') as f:
-    admin_config = json.load(f)
+# Previous / next buttons; each page's cursor is kept so "Previous" can go back
+def page_navigation(key, next_cursor, total, page_size):
+    cursors = st.session_state[f"{key}_cursors"]
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("◀ Previous", key=f"{key}_prev", disabled=len(cursors) == 1, on_click=cursors.pop)
+    with col2:
+        st.caption(f"Page {len(cursors)} of {max(-(-total // page_size), 1)} ({total:,} records)")
+    with col3:
+        st.button("Next ▶", key=f"{key}_next", disabled=next_cursor is None,
+                  on_click=cursors.append, args=(next_cursor,))
 
-# Load URL shortener data
-with open(URL_SHORTENER_FILE, 'r') as f:
-    url_data = json.load(f)
+# Retire expired short codes now and then, in a daemon thread per process
+@st.cache_resource(show_spinner=False)
+def start_code_sweeper():
+    def sweep_forever():
+        while True:
+            try:
+                now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                expired = sweep_expired(URL_SHORTENER_FILE, SHORT_CODE_INDEX_FILE, now)
+                if expired:
+                    log_url_history(*({
+                        "timestamp": now,
+                        "action": "expired",
+                        "code": code,
+                        "by": "system"
+                    } for code in expired))
+            except Exception:
+                pass  # try again on the next round
+            time.sleep(CODE_SWEEP_INTERVAL_SECONDS)
 
-# Grading table
-GRADE_TABLE = [
-    (91, 100, 'A', 4.00),
-    (80, 90, 'A-', 3.66),
-    (75, 79, 'B+', 3.33),
-    (71, 74, 'B', 3.00),
-    (68, 70, 'B-', 2.66),
-    (64, 67, 'C+', 2.33),
-    (61, 63, 'C', 2.00),
-    (58, 60, 'C-', 1.66),
-    (54, 57, 'D+', 1.33),
-    (50, 53, 'D', 1.00),
-    (0, 49, 'F', 0.00)
-]
+    sweeper = threading.Thread(target=sweep_forever, name="short-code-sweeper", daemon=True)
+    sweeper.start()
+    return sweeper
 
-def get_grade_info(percentage):
-    for min_score, max_score, grade, gpa in GRADE_TABLE:
-        if min_score <= percentage <= max_score:
-            return grade, gpa
-    return 'F', 0.00
+# Create the data directory and files once per process, not on every rerun
+@st.cache_resource(show_spinner=False)
+def init_data_files():
+    Path(DATA_DIR).mkdir(exist_ok=True)
+    init_admin_config()
+    init_url_shortener()
+    init_student_data()
 
 def export_to_csv(data, calculation_type, student_name=None):
     """Export data to CSV format"""
+    import pandas as pd
+    
     if calculation_type == 'GPA':
         if student_name:  # Individual student
             # Create two CSV files for individual report
@@ -188,128 +303,7 @@ def export_to_csv(data, calculation_type, student_name=None):
             return df.to_csv(index=False), None
 
 # Custom CSS
-st.markdown("""
-    <style>
-    .main-header {
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        padding: 2rem;
-        border-radius: 10px;
-        color: white;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    .metric-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 1.5rem;
-        border-radius: 10px;
-        color: white;
-        text-align: center;
-    }
-    .result-card {
-        background: #f0f9ff;
-        padding: 1.5rem;
-        border-radius: 10px;
-        border-left: 4px solid #667eea;
-        margin: 1rem 0;
-    }
-    .stButton>button {
-        background-color: #667eea;
-        color: white;
-        font-weight: bold;
-        border: none;
-        border-radius: 5px;
-        padding: 0.5rem 1rem;
-        margin: 0.25rem 0;
-    }
-    .stButton>button:hover {
-        background-color: #5a67d8;
-    }
-    .admin-panel {
-        background: #f8f9fa;
-        padding: 2rem;
-        border-radius: 10px;
-        border: 1px solid #dee2e6;
-    }
-    .login-container {
-        max-width: 400px;
-        margin: 0 auto;
-        padding: 2rem;
-        background: white;
-        border-radius: 10px;
-        box-shadow: 0 0 20px rgba(0,0,0,0.1);
-    }
-    .url-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 1.5rem;
-        border-radius: 10px;
-        color: white;
-        text-align: center;
-        margin: 1rem 0;
-    }
-    .short-url-container {
-        background: #f0f9ff;
-        padding: 1.5rem;
-        border-radius: 10px;
-        border-left: 4px solid #667eea;
-        margin: 1rem 0;
-    }
-    .danger-button {
-        background-color: #dc3545 !important;
-        color: white !important;
-    }
-    .danger-button:hover {
-        background-color: #c82333 !important;
-    }
-    .warning-button {
-        background-color: #ffc107 !important;
-        color: #212529 !important;
-    }
-    .warning-button:hover {
-        background-color: #e0a800 !important;
-    }
-    .deactivated-message {
-        background-color: #fff3cd;
-        border: 1px solid #ffeaa7;
-        border-radius: 10px;
-        padding: 2rem;
-        text-align: center;
-        margin: 2rem auto;
-        max-width: 600px;
-    }
-    .deactivated-title {
-        color: #856404;
-        font-size: 1.5rem;
-        margin-bottom: 1rem;
-    }
-    .deactivated-text {
-        color: #856404;
-        font-size: 1.1rem;
-    }
-    .back-button {
-        background-color: #6c757d !important;
-        color: white !important;
-        margin-top: 1rem;
-    }
-    .delete-confirmation {
-        background-color: #fff3cd;
-        border: 1px solid #ffeaa7;
-        border-radius: 10px;
-        padding: 2rem;
-        margin: 1rem 0;
-    }
-    .calculator-container {
-        max-width: 1200px;
-        margin: 0 auto;
-    }
-    .export-option {
-        background: #f8f9fa;
-        padding: 1rem;
-        border-radius: 10px;
-        border-left: 4px solid #28a745;
-        margin: 0.5rem 0;
-    }
-    </style>
-""", unsafe_allow_html=True)
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # Initialize session state for authentication
 if 'authenticated' not in st.session_state:
@@ -335,8 +329,7 @@ def admin_login():
         submit = st.form_submit_button("Login")
         
         if submit:
-            with open(ADMIN_CONFIG_FILE, 'r') as f:
-                current_admin_config = json.load(f)
+            current_admin_config = cached_json(ADMIN_CONFIG_FILE)
             
             if username == current_admin_config["username"] and hash_password(password) == current_admin_config["password_hash"]:
                 st.session_state.authenticated = True
@@ -353,20 +346,9 @@ def admin_login():
             st.session_state.show_admin_login = False
             st.rerun()
 
-# Show deactivated URL message to students
-def show_deactivated_message():
-    st.markdown("""
-        <div class="deactivated-message">
-            <h2 class="deactivated-title">🚫 URL Deactivated</h2>
-            <p class="deactivated-text">
-                <strong>This URL has been deactivated by your class CR.</strong><br><br>
-                Please contact your class representative for a new access URL.
-            </p>
-            <p style="color: #666; margin-top: 1rem;">
-                If you are the admin, please login through the admin panel.
-            </p>
-        </div>
-    """, unsafe_allow_html=True)
+# Show deactivated (or expired) URL message to students
+def show_deactivated_message(expired=False):
+    st.markdown(EXPIRED_HTML if expired else DEACTIVATED_HTML, unsafe_allow_html=True)
     
     if st.button("🔐 Admin Login", key="admin_login_deactivated"):
         st.session_state.show_admin_login = True
@@ -374,11 +356,14 @@ def show_deactivated_message():
 
 # Admin Panel
 def admin_panel():
+    # Deferred so the student pages and the login page do not pay for them
+    import pandas as pd
+    from exporters import cached_cohort_xlsx_export, cached_csv_export, cached_student_report_xlsx
+    
     st.sidebar.title("👨‍💼 Admin Panel")
     
     # Display current admin username
-    with open(ADMIN_CONFIG_FILE, 'r') as f:
-        current_admin_config = json.load(f)
+    current_admin_config = cached_json(ADMIN_CONFIG_FILE)
     
     st.sidebar.info(f"Logged in as: **{current_admin_config['username']}**")
     
@@ -386,7 +371,7 @@ def admin_panel():
     menu = st.sidebar.selectbox(
         "Navigation",
         ["📊 Dashboard", "🔗 Short URL System", "🎓 Student GPA Records", 
-         "📈 Student CGPA Records", "👤 Admin Account"]
+         "📈 Student CGPA Records", "🧑‍🎓 Student History", "👤 Admin Account"]
     )
     
     if menu == "📊 Dashboard":
@@ -394,33 +379,44 @@ def admin_panel():
         
         col1, col2, col3 = st.columns(3)
         
-        # Load data for stats
-        gpa_data = load_data(STUDENT_GPA_FILE)
-        cgpa_data = load_data(STUDENT_CGPA_FILE)
+        # Running aggregates maintained by the record stores on every append
+        gpa_stats = get_record_store(STUDENT_GPA_FILE).stats()
+        cgpa_stats = get_record_store(STUDENT_CGPA_FILE).stats()
         
         # Load URL data
-        with open(URL_SHORTENER_FILE, 'r') as f:
-            url_data = json.load(f)
+        url_data = cached_json(URL_SHORTENER_FILE, {})
         
         with col1:
-            st.metric("Total GPA Calculations", len(gpa_data))
+            st.metric("Total GPA Calculations", gpa_stats['count'])
         with col2:
-            st.metric("Total CGPA Calculations", len(cgpa_data))
+            st.metric("Total CGPA Calculations", cgpa_stats['count'])
         with col3:
-            active_short_codes = len(url_data.get("active_short_codes", []))
+            active_short_codes = code_status_counts(SHORT_CODE_INDEX_FILE)["active"]
             st.metric("Active Short URLs", active_short_codes)
         
+        col1, col2, col3, col4 = st.columns(4)
+        for col, label, value in ((col1, "Mean GPA", stats_mean(gpa_stats)),
+                                  (col2, "Median GPA", stats_median(gpa_stats)),
+                                  (col3, "Mean CGPA", stats_mean(cgpa_stats)),
+                                  (col4, "Median CGPA", stats_median(cgpa_stats))):
+            col.metric(label, "-" if value is None else f"{value:.2f}")
+        
+        # Submissions per day over the last 30 days with activity
+        per_day = {}
+        for kind, stats in (('GPA', gpa_stats), ('CGPA', cgpa_stats)):
+            for day, n in stats['per_day'].items():
+                per_day.setdefault(day, {'GPA': 0, 'CGPA': 0})[kind] = n
+        if per_day:
+            st.subheader("Submissions per Day")
+            days = sorted(per_day)[-30:]
+            st.bar_chart(pd.DataFrame([per_day[day] for day in days], index=days))
+        
         # Recent activity
         st.subheader("Recent Activity")
         
         # Combine and sort recent records
-        all_records = []
-        for record in gpa_data[-5:]:
-            record['type'] = 'GPA'
-            all_records.append(record)
-        for record in cgpa_data[-5:]:
-            record['type'] = 'CGPA'
-            all_records.append(record)
+        all_records = [dict(record, type='GPA') for record in gpa_stats['recent']]
+        all_records += [dict(record, type='CGPA') for record in cgpa_stats['recent']]
         
         all_records.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
         
@@ -436,12 +432,35 @@ def admin_panel():
                 else:
                     st.write(f"CGPA: {record.get('final_cgpa', 0):.2f}")
             st.divider()
-    
+
+        # Data cache counters
+        with st.expander("⚙️ Data Cache"):
+            stats = cache_stats()
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Cache Hits", stats["hits"])
+            col2.metric("Cache Misses", stats["misses"])
+            col3.metric("Hit Rate", f"{stats['hit_rate']:.0%}")
+        
+        # Student save path: write queues and rate limiters of this process
+        with st.expander("🚦 Submission Queue"):
+            for label, file_path in (("GPA", STUDENT_GPA_FILE), ("CGPA", STUDENT_CGPA_FILE)):
+                queue_stats = get_write_queue(get_record_store(file_path)).metrics()
+                st.markdown(f"**{label} Records**")
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Queue Depth", f"{queue_stats['depth']} (max {queue_stats['max_depth']})")
+                col2.metric("Flushes", f"{queue_stats['flushes']:,}")
+                col3.metric("Mean Batch", f"{queue_stats['mean_batch']:.1f}")
+                col4.metric("Flush Latency", f"{queue_stats['mean_flush_ms']:.1f} ms",
+                            help=f"Last {queue_stats['last_flush_ms']:.1f} ms, max {queue_stats['max_flush_ms']:.1f} ms")
+            code_limiter, session_limiter = save_limiters()
+            col1, col2 = st.columns(2)
+            col1.metric("Saves Shed (per code)", f"{code_limiter.shed:,}")
+            col2.metric("Saves Shed (per session)", f"{session_limiter.shed:,}")
+
     elif menu == "🔗 Short URL System":
         st.title("🔗 Short URL System")
         
-        with open(URL_SHORTENER_FILE, 'r') as f:
-            url_data = json.load(f)
+        url_data = cached_json(URL_SHORTENER_FILE, {})
         
         # Get current app URL
         try:
@@ -482,65 +501,136 @@ def admin_panel():
             with col2:
                 code_length = st.selectbox("Code Length", [6, 8, 10], index=1)
             
+            col1, col2 = st.columns(2)
+            with col1:
+                expires_in_days = st.number_input("Expires After (days, 0 = never)", min_value=0, value=0)
+            with col2:
+                max_uses = st.number_input("Max Uses (0 = unlimited)", min_value=0, value=0)
+            
             if st.form_submit_button("🎯 Generate Short URL"):
-                if custom_code:
-                    short_code = custom_code
+                # Save to database; a new code is minted under the lock so it can't collide
+                try:
+                    with url_transaction(URL_SHORTENER_FILE, SHORT_CODE_INDEX_FILE) as url_data:
+                        if custom_code:
+                            short_code = custom_code
+                        else:
+                            short_code = mint_codes(url_data.get("short_codes", {}), 1, code_length)[0]
+                        
+                        # Refuses to overwrite an existing code
+                        limits = {}
+                        if expires_in_days:
+                            limits["expires_at"] = (datetime.now() + timedelta(days=expires_in_days)
+                                                    ).strftime("%Y-%m-%d %H:%M:%S")
+                        if max_uses:
+                            limits["max_uses"] = max_uses
+                        created = add_codes(url_data, [short_code], st.session_state.current_user, base_url,
+                                            datetime.now().strftime("%Y-%m-%d %H:%M:%S"), **limits)
+                        full_url = created[short_code]["full_url"]
+                        
+                        # Add to history
+                        history_entry = {
+                            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                            "action": "created",
+                            "code": short_code,
+                            "by": st.session_state.current_user,
+                            "url": full_url
+                        }
+                        log_url_history(history_entry)
+                except ValueError as e:
+                    st.error(f"❌ {e}")
                 else:
-                    short_code = generate_short_code(code_length)
-                
-                # Create full URL with student parameter
-                base_url_clean = base_url.rstrip('/')
-                full_url = f"{base_url_clean}/?student={short_code}"
-                
-                # Save to database
-                if "short_codes" not in url_data:
-                    url_data["short_codes"] = {}
-                
-                url_data["short_codes"][short_code] = {
-                    "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "created_by": st.session_state.current_user,
-                    "full_url": full_url,
-                    "status": "active",
-                    "base_url_used": base_url_clean
-                }
-                
-                # Add to active codes
-                if "active_short_codes" not in url_data:
-                    url_data["active_short_codes"] = []
+                    st.success(f"✅ Short URL created successfully!")
                 
-                if short_code not in url_data["active_short_codes"]:
-                    url_data["active_short_codes"].append(short_code)
+                    # Display the generated URL
+                    st.markdown(f"""
+                    <div class="short-url-container">
+                        <h3>🎯 Your Short URL:</h3>
+                        <h4><code>{full_url}</code></h4>
+                        <p>Copy and share this URL with students</p>
+                    </div>
+                    """, unsafe_allow_html=True)
                 
-                # Add to history
-                history_entry = {
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "action": "created",
-                    "code": short_code,
-                    "by": st.session_state.current_user,
-                    "url": full_url
-                }
-                
-                if "url_history" not in url_data:
-                    url_data["url_history"] = []
-                
-                url_data["url_history"].append(history_entry)
-                
-                # Save data
-                save_data(URL_SHORTENER_FILE, url_data)
-                
-                st.success(f"✅ Short URL created successfully!")
-                
-                # Display the generated URL
-                st.markdown(f"""
-                <div class="short-url-container">
-                    <h3>🎯 Your Short URL:</h3>
-                    <h4><code>{full_url}</code></h4>
-                    <p>Copy and share this URL with students</p>
-                </div>
-                """, unsafe_allow_html=True)
+                    # Copy button
+                    st.code(full_url, language="text")
+        
+        # Mint one code per course section for a whole term
+        with st.expander("📦 Mint Codes for a Term"):
+            with st.form("mint_term_codes"):
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    mint_term = st.text_input("Term", placeholder="e.g., Fall 2026")
+                with col2:
+                    mint_length = st.selectbox("Code Length", [6, 8, 10], index=1, key="mint_code_length")
+                mint_sections = st.text_area("Course Sections (one per line)",
+                                             placeholder="CS101-A\nCS101-B\nMTH201-A")
+                mint_expiry = st.date_input("Expires On (optional)", value=None)
                 
-                # Copy button
-                st.code(full_url, language="text")
+                if st.form_submit_button("📦 Mint Codes"):
+                    mint_term = mint_term.strip()
+                    section_names = list(dict.fromkeys(
+                        line.strip() for line in mint_sections.splitlines() if line.strip()))
+                    if not mint_term or not section_names:
+                        st.error("Please enter a term and at least one course section.")
+                    else:
+                        try:
+                            # All codes are minted against the registry in one transaction
+                            with url_transaction(URL_SHORTENER_FILE, SHORT_CODE_INDEX_FILE) as url_data:
+                                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                                codes = mint_codes(url_data.get("short_codes", {}), len(section_names), mint_length)
+                                limits = {}
+                                if mint_expiry:
+                                    limits["expires_at"] = f"{mint_expiry:%Y-%m-%d} 23:59:59"
+                                minted = add_codes(url_data, codes, st.session_state.current_user, base_url,
+                                                   timestamp, term=mint_term, **limits)
+                                for code, section in zip(codes, section_names):
+                                    minted[code]["section"] = section
+                                
+                                history_entries = [{
+                                    "timestamp": timestamp,
+                                    "action": "created",
+                                    "code": code,
+                                    "by": st.session_state.current_user,
+                                    "url": details["full_url"]
+                                } for code, details in minted.items()]
+                                history_entries.append({
+                                    "timestamp": timestamp,
+                                    "action": "term_minted",
+                                    "term": mint_term,
+                                    "minted_count": len(minted),
+                                    "by": st.session_state.current_user
+                                })
+                                log_url_history(*history_entries)
+                        except ValueError as e:
+                            st.error(f"❌ {e}")
+                        else:
+                            st.success(f"✅ Minted {len(minted)} codes for {mint_term}!")
+                            st.session_state.mint_download_term = mint_term
+            
+            # Bulk CSV download of a term's codes
+            term_codes = {}
+            for code, details in url_data.get("short_codes", {}).items():
+                if "term" in details:
+                    term_codes.setdefault(details["term"], []).append({
+                        'Section': details.get('section', ''),
+                        'Short Code': code,
+                        'URL': details.get('full_url', ''),
+                        'Status': details.get('status', 'active')
+                    })
+            
+            if term_codes:
+                terms = sorted(term_codes)
+                last_term = st.session_state.get('mint_download_term')
+                download_term = st.selectbox("Download Codes for Term", terms,
+                                             index=terms.index(last_term) if last_term in terms else 0)
+                term_df = pd.DataFrame(term_codes[download_term])
+                st.dataframe(term_df, use_container_width=True, hide_index=True)
+                st.download_button(
+                    label=f"📥 Download {len(term_df)} Codes (CSV)",
+                    data=term_df.to_csv(index=False),
+                    file_name=f"short_codes_{download_term.replace(' ', '_')}.csv",
+                    mime="text/csv",
+                    key="download_term_codes"
+                )
         
         # Display active short URLs
         st.subheader("📋 Active Short URLs")
@@ -556,6 +646,9 @@ def admin_panel():
                         'URL': details.get('full_url', ''),
                         'Created At': details.get('created_at', ''),
                         'Created By': details.get('created_by', ''),
+                        'Expires At': details.get('expires_at', ''),
+                        'Uses': (f"{code_uses(SHORT_CODE_INDEX_FILE, code)} / {details['max_uses']}"
+                                 if details.get('max_uses') else ''),
                         'Status': details.get('status', 'active')
                     })
             
@@ -586,59 +679,49 @@ def admin_panel():
                     if selected_code:
                         # Deactivate button with confirmation
                         if st.button("🚫 Deactivate Code", type="primary", key="deactivate"):
-                            url_data["short_codes"][selected_code]["status"] = "inactive"
-                            if selected_code in url_data.get("active_short_codes", []):
-                                url_data["active_short_codes"].remove(selected_code)
-                            
-                            # Add to history
-                            history_entry = {
-                                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                "action": "deactivated",
-                                "code": selected_code,
-                                "by": st.session_state.current_user,
-                                "message": "Deactivated by class CR"
-                            }
-                            url_data["url_history"].append(history_entry)
+                            with url_transaction(URL_SHORTENER_FILE, SHORT_CODE_INDEX_FILE) as url_data:
+                                set_code_status(url_data, [selected_code], "inactive")
+                                
+                                # Add to history
+                                history_entry = {
+                                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                    "action": "deactivated",
+                                    "code": selected_code,
+                                    "by": st.session_state.current_user,
+                                    "message": "Deactivated by class CR"
+                                }
+                                log_url_history(history_entry)
                             
-                            save_data(URL_SHORTENER_FILE, url_data)
                             st.success(f"✅ Code '{selected_code}' has been deactivated!")
                             st.info("Students will now see a message that the URL was deactivated by their class CR.")
                             st.rerun()
                         
                         # Regenerate button
                         if st.button("🔄 Regenerate Code", key="regenerate"):
-                            new_code = generate_short_code(8)
-                            old_data = url_data["short_codes"][selected_code]
-                            
-                            # Deactivate old
-                            url_data["short_codes"][selected_code]["status"] = "inactive"
-                            if selected_code in url_data.get("active_short_codes", []):
-                                url_data["active_short_codes"].remove(selected_code)
-                            
-                            # Create new
-                            base_url_used = old_data.get('base_url_used', base_url)
-                            new_full_url = f"{base_url_used}/?student={new_code}"
-                            url_data["short_codes"][new_code] = {
-                                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                "created_by": st.session_state.current_user,
-                                "full_url": new_full_url,
-                                "status": "active",
-                                "base_url_used": base_url_used
-                            }
-                            
-                            url_data["active_short_codes"].append(new_code)
-                            
-                            # Add to history
-                            history_entry = {
-                                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                "action": "regenerated",
-                                "old_code": selected_code,
-                                "new_code": new_code,
-                                "by": st.session_state.current_user
-                            }
-                            url_data["url_history"].append(history_entry)
+                            with url_transaction(URL_SHORTENER_FILE, SHORT_CODE_INDEX_FILE) as url_data:
+                                new_code = mint_codes(url_data["short_codes"], 1)[0]
+                                old_data = url_data["short_codes"][selected_code]
+                                
+                                # Deactivate old
+                                set_code_status(url_data, [selected_code], "inactive")
+                                
+                                # Create new, keeping the old code's limits
+                                add_codes(url_data, [new_code], st.session_state.current_user,
+                                          old_data.get('base_url_used', base_url),
+                                          datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                          **{field: old_data[field] for field in ('expires_at', 'max_uses')
+                                             if field in old_data})
+                                
+                                # Add to history
+                                history_entry = {
+                                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                    "action": "regenerated",
+                                    "old_code": selected_code,
+                                    "new_code": new_code,
+                                    "by": st.session_state.current_user
+                                }
+                                log_url_history(history_entry)
                             
-                            save_data(URL_SHORTENER_FILE, url_data)
                             st.success(f"✅ New code '{new_code}' generated!")
                             st.rerun()
                         
@@ -668,27 +751,17 @@ def admin_panel():
             
             with col1:
                 if st.button("✅ Yes, Delete", type="primary"):
-                    # Remove from short_codes
-                    if url_to_delete in url_data["short_codes"]:
-                        # Add to history before deleting
-                        history_entry = {
-                            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "action": "deleted",
-                            "code": url_to_delete,
-                            "by": st.session_state.current_user,
-                            "url": url_data["short_codes"][url_to_delete].get('full_url', '')
-                        }
-                        url_data["url_history"].append(history_entry)
-                        
-                        # Delete the URL
-                        del url_data["short_codes"][url_to_delete]
-                    
-                    # Remove from active_short_codes if present
-                    if url_to_delete in url_data.get("active_short_codes", []):
-                        url_data["active_short_codes"].remove(url_to_delete)
-                    
-                    # Save data
-                    save_data(URL_SHORTENER_FILE, url_data)
+                    with url_transaction(URL_SHORTENER_FILE, SHORT_CODE_INDEX_FILE) as url_data:
+                        # Delete the URL and record it in the history
+                        for code, details in delete_codes(url_data, [url_to_delete]).items():
+                            history_entry = {
+                                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                "action": "deleted",
+                                "code": code,
+                                "by": st.session_state.current_user,
+                                "url": details.get('full_url', '')
+                            }
+                            log_url_history(history_entry)
                     
                     st.success(f"✅ URL '{url_to_delete}' has been deleted!")
                     st.session_state.show_delete_url_confirm = False
@@ -704,8 +777,8 @@ def admin_panel():
         # Bulk Delete URLs Section
         st.subheader("🗑️ Bulk URL Management")
         
-        with st.expander("Delete Multiple URLs"):
-            st.warning("⚠️ **Warning:** This will permanently delete selected URLs from the system.")
+        with st.expander("Deactivate or Delete Multiple URLs"):
+            st.warning("⚠️ **Warning:** Deleting permanently removes the selected URLs from the system.")
             
             if url_data.get("short_codes"):
                 # Get all URLs for selection
@@ -722,9 +795,29 @@ def admin_panel():
                     if urls_to_delete:
                         st.warning(f"Selected {len(urls_to_delete)} URL(s) for deletion:")
                         
-                        for url_code in urls_to_delete:
-                            url_details = url_data["short_codes"][url_code]
-                            st.write(f"- **{url_code}**: {url_details.get('full_url', '')} (Status: {url_details.get('status', 'unknown')})")
+                        selected_df = pd.DataFrame([
+                            {'Short Code': url_code,
+                             'URL': url_data["short_codes"][url_code].get('full_url', ''),
+                             'Status': url_data["short_codes"][url_code].get('status', 'unknown')}
+                            for url_code in urls_to_delete
+                        ])
+                        st.dataframe(selected_df, use_container_width=True, hide_index=True)
+                        
+                        # One transaction and one history append for the whole selection
+                        if st.button("🚫 Deactivate Selected URLs", key="bulk_deactivate"):
+                            with url_transaction(URL_SHORTENER_FILE, SHORT_CODE_INDEX_FILE) as url_data:
+                                deactivated = set_code_status(url_data, urls_to_delete, "inactive")
+                                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                                log_url_history(*({
+                                    "timestamp": timestamp,
+                                    "action": "deactivated",
+                                    "code": url_code,
+                                    "by": st.session_state.current_user,
+                                    "message": "Deactivated by class CR"
+                                } for url_code in deactivated))
+                            
+                            st.success(f"✅ {len(deactivated)} URL(s) deactivated!")
+                            st.rerun()
                         
                         # Confirmation for bulk delete
                         confirmation_text = st.text_input(
@@ -734,39 +827,27 @@ def admin_panel():
                         
                         if st.button("🗑️ Delete Selected URLs", type="secondary", key="bulk_delete"):
                             if confirmation_text == f"DELETE {len(urls_to_delete)}":
-                                deleted_count = 0
-                                
-                                for url_code in urls_to_delete:
-                                    if url_code in url_data["short_codes"]:
-                                        # Add to history
-                                        history_entry = {
-                                            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                            "action": "bulk_deleted",
-                                            "code": url_code,
-                                            "by": st.session_state.current_user
-                                        }
-                                        url_data["url_history"].append(history_entry)
-                                        
-                                        # Delete from short_codes
-                                        del url_data["short_codes"][url_code]
-                                        deleted_count += 1
+                                # One transaction and one history append for the whole selection
+                                with url_transaction(URL_SHORTENER_FILE, SHORT_CODE_INDEX_FILE) as url_data:
+                                    deleted = delete_codes(url_data, urls_to_delete)
+                                    deleted_count = len(deleted)
+                                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                                    history_entries = [{
+                                        "timestamp": timestamp,
+                                        "action": "bulk_deleted",
+                                        "code": url_code,
+                                        "by": st.session_state.current_user
+                                    } for url_code in deleted]
                                     
-                                    # Remove from active_short_codes if present
-                                    if url_code in url_data.get("active_short_codes", []):
-                                        url_data["active_short_codes"].remove(url_code)
-                                
-                                # Save data
-                                save_data(URL_SHORTENER_FILE, url_data)
-                                
-                                # Add summary to history
-                                summary_entry = {
-                                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                    "action": "bulk_delete_summary",
-                                    "deleted_count": deleted_count,
-                                    "by": st.session_state.current_user
-                                }
-                                url_data["url_history"].append(summary_entry)
-                                save_data(URL_SHORTENER_FILE, url_data)
+                                    # Add summary to history
+                                    summary_entry = {
+                                        "timestamp": timestamp,
+                                        "action": "bulk_delete_summary",
+                                        "deleted_count": deleted_count,
+                                        "by": st.session_state.current_user
+                                    }
+                                    history_entries.append(summary_entry)
+                                    log_url_history(*history_entries)
                                 
                                 st.success(f"✅ {deleted_count} URL(s) deleted successfully!")
                                 st.rerun()
@@ -794,33 +875,33 @@ def admin_panel():
                 
                 if st.form_submit_button("🔄 Update Base URL"):
                     if current_base_url != base_url:
-                        url_data["base_url"] = current_base_url
-                        
-                        # Update all existing active URLs with new base URL
-                        if "short_codes" in url_data:
-                            for code, details in url_data["short_codes"].items():
-                                if details.get("status") == "active":
-                                    # Extract student code from old URL
-                                    old_url = details.get("full_url", "")
-                                    if "student=" in old_url:
-                                        student_code = old_url.split("student=")[-1]
-                                        # Clean the base URL
-                                        new_base_url = current_base_url.rstrip('/')
-                                        new_full_url = f"{new_base_url}/?student={student_code}"
-                                        url_data["short_codes"][code]["full_url"] = new_full_url
-                                        url_data["short_codes"][code]["base_url_used"] = new_base_url
-                        
-                        # Add to history
-                        history_entry = {
-                            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "action": "base_url_changed",
-                            "old_base_url": base_url,
-                            "new_base_url": current_base_url,
-                            "by": st.session_state.current_user
-                        }
-                        url_data["url_history"].append(history_entry)
+                        with url_transaction(URL_SHORTENER_FILE, SHORT_CODE_INDEX_FILE) as url_data:
+                            url_data["base_url"] = current_base_url
+                            
+                            # Update all existing active URLs with new base URL
+                            if "short_codes" in url_data:
+                                for code, details in url_data["short_codes"].items():
+                                    if details.get("status") == "active":
+                                        # Extract student code from old URL
+                                        old_url = details.get("full_url", "")
+                                        if "student=" in old_url:
+                                            student_code = old_url.split("student=")[-1]
+                                            # Clean the base URL
+                                            new_base_url = current_base_url.rstrip('/')
+                                            new_full_url = f"{new_base_url}/?student={student_code}"
+                                            url_data["short_codes"][code]["full_url"] = new_full_url
+                                            url_data["short_codes"][code]["base_url_used"] = new_base_url
+                            
+                            # Add to history
+                            history_entry = {
+                                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                "action": "base_url_changed",
+                                "old_base_url": base_url,
+                                "new_base_url": current_base_url,
+                                "by": st.session_state.current_user
+                            }
+                            log_url_history(history_entry)
                         
-                        save_data(URL_SHORTENER_FILE, url_data)
                         st.success(f"✅ Base URL updated to: {current_base_url}")
                         st.info("All active short URLs have been updated with the new base URL.")
                         st.rerun()
@@ -843,21 +924,9 @@ def admin_panel():
                 
                 if st.form_submit_button("🗑️ Delete All History", type="secondary"):
                     if confirmation == "DELETE":
-                        # Count records before deletion
-                        history_count = len(url_data.get("url_history", []))
-                        
-                        # Create a history entry for the deletion
-                        deletion_entry = {
-                            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "action": "history_cleared",
-                            "records_deleted": history_count,
-                            "by": st.session_state.current_user
-                        }
+                        # Drops every segment and leaves a history_cleared entry
+                        history_count = get_history_log(URL_HISTORY_DIR).clear(st.session_state.current_user)
                         
-                        # Clear history and add deletion entry
-                        url_data["url_history"] = [deletion_entry]
-                        
-                        save_data(URL_SHORTENER_FILE, url_data)
                         st.success(f"✅ URL history cleared! {history_count} records deleted.")
                         st.rerun()
                     else:
@@ -868,16 +937,13 @@ def admin_panel():
             st.markdown("### 🧹 Advanced Cleanup")
             
             with st.expander("Cleanup Inactive URLs"):
-                st.warning("This will permanently delete all inactive short URLs.")
+                st.warning("This will permanently delete all inactive and expired short URLs.")
                 
-                # Count inactive URLs
-                inactive_count = 0
-                if "short_codes" in url_data:
-                    for code, details in url_data["short_codes"].items():
-                        if details.get("status") == "inactive":
-                            inactive_count += 1
+                # Count inactive and expired URLs
+                status_counts = code_status_counts(SHORT_CODE_INDEX_FILE)
+                inactive_count = sum(status_counts.values()) - status_counts["active"]
                 
-                st.write(f"**Found {inactive_count} inactive URLs**")
+                st.write(f"**Found {inactive_count} inactive or expired URLs**")
                 
                 with st.form("cleanup_inactive_form"):
                     cleanup_confirmation = st.text_input(
@@ -888,24 +954,24 @@ def admin_panel():
                     if st.form_submit_button("🧹 Cleanup Inactive URLs", type="secondary"):
                         if cleanup_confirmation == "CLEANUP":
                             if inactive_count > 0:
-                                # Create new dictionary with only active URLs
-                                active_urls = {}
-                                for code, details in url_data["short_codes"].items():
-                                    if details.get("status") == "active":
-                                        active_urls[code] = details
-                                
-                                url_data["short_codes"] = active_urls
-                                
-                                # Add to history
-                                history_entry = {
-                                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                    "action": "inactive_urls_cleaned",
-                                    "inactive_urls_deleted": inactive_count,
-                                    "by": st.session_state.current_user
-                                }
-                                url_data["url_history"].append(history_entry)
+                                with url_transaction(URL_SHORTENER_FILE, SHORT_CODE_INDEX_FILE) as url_data:
+                                    # Create new dictionary with only active URLs
+                                    active_urls = {}
+                                    for code, details in url_data["short_codes"].items():
+                                        if details.get("status") == "active":
+                                            active_urls[code] = details
+                                    
+                                    url_data["short_codes"] = active_urls
+                                    
+                                    # Add to history
+                                    history_entry = {
+                                        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                        "action": "inactive_urls_cleaned",
+                                        "inactive_urls_deleted": inactive_count,
+                                        "by": st.session_state.current_user
+                                    }
+                                    log_url_history(history_entry)
                                 
-                                save_data(URL_SHORTENER_FILE, url_data)
                                 st.success(f"✅ Cleanup completed! {inactive_count} inactive URLs removed.")
                                 st.rerun()
                             else:
@@ -913,15 +979,48 @@ def admin_panel():
                         else:
                             st.error("Please type 'CLEANUP' to confirm.")
         
+        # Link usage from the buffered access counters
+        st.subheader("📊 Link Usage")
+        
+        code_stats = get_access_counters(SHORT_CODE_STATS_FILE).load()
+        if code_stats:
+            short_codes = url_data.get("short_codes", {})
+            usage_df = pd.DataFrame([{
+                'Short Code': code,
+                'Status': short_codes.get(code, {}).get('status', 'deleted'),
+                'Visits': counts['visits'],
+                'Calculations': counts['calculations'],
+                'Conversion': f"{conversion_rate(counts):.0%}",
+                'Peak Hour': (f"{int(max(counts['visit_hours'], key=counts['visit_hours'].get)):02d}:00"
+                              if counts['visit_hours'] else '')
+            } for code, counts in code_stats.items()]).sort_values('Visits', ascending=False)
+            
+            col1, col2, col3 = st.columns(3)
+            total_visits = int(usage_df['Visits'].sum())
+            total_calculations = int(usage_df['Calculations'].sum())
+            col1.metric("Link Visits", total_visits)
+            col2.metric("Calculations from Links", total_calculations)
+            col3.metric("Conversion", f"{total_calculations / total_visits:.0%}" if total_visits else "-")
+            
+            st.dataframe(usage_df, use_container_width=True, hide_index=True)
+            
+            st.markdown("**Visits by Hour of Day**")
+            st.bar_chart(pd.DataFrame({'Visits': visits_by_hour(code_stats)},
+                                      index=[f"{hour:02d}:00" for hour in range(24)]))
+        else:
+            st.info("No link visits recorded yet.")
+        
         # URL History with Direct Delete Option
         st.subheader("📜 URL History")
         
-        # Show history stats
-        history_count = len(url_data.get("url_history", []))
+        history_log = get_history_log(URL_HISTORY_DIR)
+        
+        # Show history stats (from the segment index, no entries are read)
+        history_count = history_log.count()
         st.write(f"**Total History Records:** {history_count}")
         
         # Direct Delete Button for History
-        if url_data.get("url_history"):
+        if history_count:
             col1, col2 = st.columns([4, 1])
             with col2:
                 if st.button("🗑️ Clear History", type="secondary", key="direct_delete_history"):
@@ -933,15 +1032,8 @@ def admin_panel():
                 with col1:
                     if st.button("✅ Yes, delete all history", type="primary"):
                         # Keep only the deletion entry
-                        deletion_entry = {
-                            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "action": "history_cleared",
-                            "records_deleted": history_count,
-                            "by": st.session_state.current_user
-                        }
-                        url_data["url_history"] = [deletion_entry]
+                        history_count = history_log.clear(st.session_state.current_user)
                         
-                        save_data(URL_SHORTENER_FILE, url_data)
                         st.success(f"✅ History cleared! {history_count} records deleted.")
                         st.session_state.show_clear_history_confirm = False
                         st.rerun()
@@ -950,33 +1042,41 @@ def admin_panel():
                         st.session_state.show_clear_history_confirm = False
                         st.rerun()
         
-        if url_data.get("url_history"):
-            # Filter options for history
-            col1, col2 = st.columns(2)
+        if history_count:
+            # Filter options for history (dropdowns are filled from the segment index)
+            col1, col2, col3 = st.columns(3)
             with col1:
                 filter_action = st.selectbox(
                     "Filter by Action",
-                    ["All Actions", "created", "deactivated", "regenerated", 
-                     "base_url_changed", "history_cleared", "inactive_urls_cleaned", "deleted", "bulk_deleted"]
+                    ["All Actions"] + history_log.actions()
                 )
             
             with col2:
                 filter_user = st.selectbox(
                     "Filter by User",
-                    ["All Users"] + sorted(list(set([h.get("by", "Unknown") for h in url_data["url_history"]])))
+                    ["All Users"] + history_log.users()
                 )
             
-            # Apply filters
-            filtered_history = url_data["url_history"]
-            
-            if filter_action != "All Actions":
-                filtered_history = [h for h in filtered_history if h.get("action") == filter_action]
+            with col3:
+                filter_dates = st.date_input("Filter by Date", value=(), format="YYYY-MM-DD")
             
-            if filter_user != "All Users":
-                filtered_history = [h for h in filtered_history if h.get("by") == filter_user]
+            filters = {
+                'action': None if filter_action == "All Actions" else filter_action,
+                'user': None if filter_user == "All Users" else filter_user,
+                'since': f"{filter_dates[0]} 00:00:00" if filter_dates else None,
+                'until': f"{filter_dates[-1]} 23:59:59" if filter_dates else None,
+            }
             
-            # Sort by timestamp (newest first)
-            filtered_history.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
+            # Newest first, one page at a time; older segments are only read for later pages
+            if st.session_state.get("url_history_query") != filters:
+                st.session_state.url_history_query = filters
+                st.session_state.url_history_cursors = [0]
+            offset = st.session_state.url_history_cursors[-1]
+            filtered_history, filtered_count = history_log.page(**filters, offset=offset,
+                                                                limit=URL_HISTORY_PAGE_SIZE)
+            next_offset = offset + URL_HISTORY_PAGE_SIZE
+            if next_offset >= filtered_count:
+                next_offset = None
             
             if filtered_history:
                 history_df = pd.DataFrame(filtered_history)
@@ -991,12 +1091,14 @@ def admin_panel():
                 history_df = history_df[['timestamp', 'action', 'by'] + display_cols]
                 
                 st.dataframe(history_df, use_container_width=True)
+                page_navigation("url_history", next_offset, filtered_count, URL_HISTORY_PAGE_SIZE)
                 
                 # Export history option
                 st.markdown("### 📥 Export History")
                 
                 if st.button("Export History to CSV"):
-                    csv = history_df.to_csv(index=False)
+                    # The export streams every matching entry, not just the ones shown
+                    csv = pd.DataFrame(list(history_log.iter_entries(**filters))).to_csv(index=False)
                     st.download_button(
                         label="Download CSV",
                         data=csv,
@@ -1011,23 +1113,55 @@ def admin_panel():
     elif menu == "🎓 Student GPA Records":
         st.title("Student GPA Records")
         
-        gpa_data = load_data(STUDENT_GPA_FILE)
+        gpa_store = get_record_store(STUDENT_GPA_FILE)
         
-        if gpa_data:
+        # Bulk import of a whole class
+        with st.expander("📤 Bulk Import Marks (CSV / Excel)"):
+            st.write("Upload a marks sheet with one row per course and the columns "
+                     "`user_name`, `course_name`, `total_marks`, `obtained_marks`, `credit_hours` "
+                     "(and optionally `roll_number`). "
+                     "Keep each student's rows together; every student gets one GPA record.")
+            marks_file = st.file_uploader("Marks File", type=["csv", "xlsx"], key="bulk_marks_file")
+            
+            if marks_file and st.button("📤 Import and Calculate GPA", key="bulk_import"):
+                progress_bar = st.progress(0.0, text="Importing...")
+                
+                def show_progress(rows, fraction):
+                    progress_bar.progress(fraction, text=f"{rows:,} rows processed")
+                
+                from bulk_import import import_marks
+                try:
+                    report = import_marks(marks_file, marks_file.name, gpa_store, progress=show_progress)
+                except ValueError as e:
+                    st.error(f"❌ Import failed: {e}")
+                else:
+                    progress_bar.progress(1.0, text="Import complete")
+                    st.success(f"✅ Imported {report['records']:,} GPA records from {report['rows']:,} rows.")
+                    st.info(f"⏱️ {report['seconds']:.2f}s ({report['rows_per_sec']:,.0f} rows/sec)")
+                    if report['rejected']:
+                        st.warning(f"⚠️ {report['rejected']:,} row(s) were not imported:")
+                        st.dataframe(pd.DataFrame(report['rejected_rows'], columns=['Row', 'Reason']),
+                                     use_container_width=True, hide_index=True)
+                        if report['rejected'] > len(report['rejected_rows']):
+                            st.caption(f"Showing the first {len(report['rejected_rows'])} rejected rows.")
+        
+        if gpa_store.count():
             # Filter options
             col1, col2 = st.columns(2)
             with col1:
                 search_term = st.text_input("Search by Student Name")
+            with col2:
+                search_mode = SEARCH_MODES[st.radio("Match", list(SEARCH_MODES), horizontal=True)]
             
-            # Filter data
-            filtered_data = gpa_data
-            if search_term:
-                filtered_data = [r for r in filtered_data if search_term.lower() in r.get('user_name', '').lower()]
+            # Only the visible page is loaded, sorted and sent to the browser
+            page_records, next_cursor, total, page_size = records_page(
+                gpa_store, "gpa_records", search_term, search_mode,
+                {"Date": "timestamp", "Student Name": "user_name", "GPA": "final_gpa"})
             
-            if filtered_data:
+            if total:
                 # Create display dataframe
                 display_data = []
-                for record in filtered_data:
+                for record in page_records:
                     display_data.append({
                         'Student Name': record.get('user_name', ''),
                         'Date': record.get('timestamp', ''),
@@ -1037,29 +1171,42 @@ def admin_panel():
                     })
                 
                 df = pd.DataFrame(display_data)
-                st.dataframe(df, use_container_width=True)
+                st.dataframe(df, use_container_width=True, hide_index=True)
+                page_navigation("gpa_records", next_cursor, total, page_size)
                 
                 # Export options
                 st.subheader("📥 Export Data")
                 st.markdown("**Export All Records:**")
                 
                 if st.button("📄 Download All GPA Records (CSV)"):
-                    csv_data, _ = export_to_csv(gpa_data, 'GPA')
-                    st.download_button(
-                        label="Click to Download CSV",
-                        data=csv_data,
-                        file_name=f"All_GPA_Records_{datetime.now().strftime('%Y%m%d')}.csv",
-                        mime="text/csv"
-                    )
+                    # Long-format CSV, regenerated only when the records change
+                    export_path = cached_csv_export(gpa_store, 'GPA', EXPORT_DIR)
+                    with open(export_path, 'rb') as export_file:
+                        st.download_button(
+                            label="Click to Download CSV",
+                            data=export_file,
+                            file_name=f"All_GPA_Records_{datetime.now().strftime('%Y%m%d')}.csv",
+                            mime="text/csv"
+                        )
+                
+                if st.button("📗 Download All GPA Records (Excel)"):
+                    # One sheet per student, regenerated only when the records change
+                    export_path = cached_cohort_xlsx_export(gpa_store, 'GPA', EXPORT_DIR)
+                    with open(export_path, 'rb') as export_file:
+                        st.download_button(
+                            label="Click to Download Excel",
+                            data=export_file,
+                            file_name=f"All_GPA_Records_{datetime.now().strftime('%Y%m%d')}.xlsx",
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                        )
                 
                 # Individual student export
                 st.markdown("---")
                 st.markdown("**Export Individual Student Report:**")
-                student_names = list(set([r.get('user_name', '') for r in filtered_data]))
-                selected_student = st.selectbox("Select Student for Individual Report", [""] + student_names)
+                selected_student = select_student(gpa_store, search_term, search_mode, "gpa_student")
                 
                 if selected_student:
-                    student_records = [r for r in filtered_data if r.get('user_name', '') == selected_student]
+                    student_records = gpa_store.records_for(selected_student)
                     if student_records:
                         # Take the most recent record for the student
                         latest_record = max(student_records, key=lambda x: x.get('timestamp', ''))
@@ -1087,6 +1234,14 @@ def admin_panel():
                                 file_name=f"GPA_Courses_{selected_student}_{datetime.now().strftime('%Y%m%d')}.csv",
                                 mime="text/csv"
                             )
+                        
+                        # Excel report (summary + courses sheets)
+                        st.download_button(
+                            label="📗 Download Excel Report",
+                            data=cached_student_report_xlsx(gpa_store, latest_record, 'GPA', selected_student),
+                            file_name=f"GPA_Report_{selected_student}_{datetime.now().strftime('%Y%m%d')}.xlsx",
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                        )
             else:
                 st.info("No records found with the selected filters.")
         else:
@@ -1095,23 +1250,26 @@ def admin_panel():
     elif menu == "📈 Student CGPA Records":
         st.title("Student CGPA Records")
         
-        cgpa_data = load_data(STUDENT_CGPA_FILE)
+        cgpa_store = get_record_store(STUDENT_CGPA_FILE)
         
-        if cgpa_data:
+        if cgpa_store.count():
             # Filter options
             col1, col2 = st.columns(2)
             with col1:
                 search_term = st.text_input("Search by Student Name", key="cgpa_search")
+            with col2:
+                search_mode = SEARCH_MODES[st.radio("Match", list(SEARCH_MODES), horizontal=True,
+                                                    key="cgpa_search_mode")]
             
-            # Filter data
-            filtered_data = cgpa_data
-            if search_term:
-                filtered_data = [r for r in filtered_data if search_term.lower() in r.get('user_name', '').lower()]
+            # Only the visible page is loaded, sorted and sent to the browser
+            page_records, next_cursor, total, page_size = records_page(
+                cgpa_store, "cgpa_records", search_term, search_mode,
+                {"Date": "timestamp", "Student Name": "user_name", "CGPA": "final_cgpa"})
             
-            if filtered_data:
+            if total:
                 # Create display dataframe
                 display_data = []
-                for record in filtered_data:
+                for record in page_records:
                     display_data.append({
                         'Student Name': record.get('user_name', ''),
                         'Date': record.get('timestamp', ''),
@@ -1121,30 +1279,42 @@ def admin_panel():
                     })
                 
                 df = pd.DataFrame(display_data)
-                st.dataframe(df, use_container_width=True)
+                st.dataframe(df, use_container_width=True, hide_index=True)
+                page_navigation("cgpa_records", next_cursor, total, page_size)
                 
                 # Export options
                 st.subheader("📥 Export Data")
                 st.markdown("**Export All Records:**")
                 
                 if st.button("📄 Download All CGPA Records (CSV)"):
-                    csv_data, _ = export_to_csv(cgpa_data, 'CGPA')
-                    st.download_button(
-                        label="Click to Download CSV",
-                        data=csv_data,
-                        file_name=f"All_CGPA_Records_{datetime.now().strftime('%Y%m%d')}.csv",
-                        mime="text/csv"
-                    )
+                    # Long-format CSV, regenerated only when the records change
+                    export_path = cached_csv_export(cgpa_store, 'CGPA', EXPORT_DIR)
+                    with open(export_path, 'rb') as export_file:
+                        st.download_button(
+                            label="Click to Download CSV",
+                            data=export_file,
+                            file_name=f"All_CGPA_Records_{datetime.now().strftime('%Y%m%d')}.csv",
+                            mime="text/csv"
+                        )
+                
+                if st.button("📗 Download All CGPA Records (Excel)"):
+                    # One sheet per student, regenerated only when the records change
+                    export_path = cached_cohort_xlsx_export(cgpa_store, 'CGPA', EXPORT_DIR)
+                    with open(export_path, 'rb') as export_file:
+                        st.download_button(
+                            label="Click to Download Excel",
+                            data=export_file,
+                            file_name=f"All_CGPA_Records_{datetime.now().strftime('%Y%m%d')}.xlsx",
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                        )
                 
                 # Individual student export
                 st.markdown("---")
                 st.markdown("**Export Individual Student Report:**")
-                student_names = list(set([r.get('user_name', '') for r in filtered_data]))
-                selected_student = st.selectbox("Select Student for Individual Report", 
-                                               [""] + student_names, key="cgpa_student")
+                selected_student = select_student(cgpa_store, search_term, search_mode, "cgpa_student")
                 
                 if selected_student:
-                    student_records = [r for r in filtered_data if r.get('user_name', '') == selected_student]
+                    student_records = cgpa_store.records_for(selected_student)
                     if student_records:
                         # Take the most recent record for the student
                         latest_record = max(student_records, key=lambda x: x.get('timestamp', ''))
@@ -1172,16 +1342,112 @@ def admin_panel():
                                 file_name=f"CGPA_Semesters_{selected_student}_{datetime.now().strftime('%Y%m%d')}.csv",
                                 mime="text/csv"
                             )
+                        
+                        # Excel report (summary + semesters sheets)
+                        st.download_button(
+                            label="📗 Download Excel Report",
+                            data=cached_student_report_xlsx(cgpa_store, latest_record, 'CGPA', selected_student),
+                            file_name=f"CGPA_Report_{selected_student}_{datetime.now().strftime('%Y%m%d')}.xlsx",
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                        )
             else:
                 st.info("No records found with the selected filters.")
         else:
             st.info("No CGPA records available yet.")
     
+    elif menu == "🧑‍🎓 Student History":
+        st.title("🧑‍🎓 Student History")
+        
+        gpa_store = get_record_store(STUDENT_GPA_FILE)
+        cgpa_store = get_record_store(STUDENT_CGPA_FILE)
+        aliases = load_aliases(STUDENT_ALIASES_FILE)
+        
+        # Students by identity (roll number or normalized name), merged keys folded in
+        directory = history_directory(gpa_store, cgpa_store)
+        
+        if directory:
+            # Matching students come from the stores' name indexes
+            search_term = st.text_input("Search Student", key="history_search")
+            match_keys, more = set(), False
+            for store in (gpa_store, cgpa_store):
+                keys, total = store.name_index().search_students(search_term, 'contains', NAME_PAGE_SIZE)
+                match_keys.update(canonical_key(key, aliases) for key in keys)
+                more = more or total > NAME_PAGE_SIZE
+            matches = sorted((k for k in match_keys if k in directory),
+                             key=lambda k: normalize_name(directory[k]['name']))[:NAME_PAGE_SIZE]
+            st.caption(f"{len(matches):,} of {len(directory):,} students"
+                       + (" (refine the search to see more)" if more or len(match_keys) > NAME_PAGE_SIZE else ""))
+            
+            def student_label(key):
+                entry = directory[key]
+                return f"{entry['name']} [{key}] · {entry['GPA']} GPA, {entry['CGPA']} CGPA"
+            
+            labels = {student_label(k): k for k in matches}
+            selected_label = st.selectbox("Select Student", [""] + list(labels)[:NAME_PAGE_SIZE],
+                                          key="history_student")
+            selected_key = labels.get(selected_label)
+            
+            if selected_key:
+                keys = sorted(directory[selected_key]['keys'])
+                
+                # Full GPA/CGPA timeline from the per-student record index
+                timeline = [{'Date': r.get('timestamp', ''), 'Type': 'GPA', 'Name': r.get('user_name', ''),
+                             'Result': r.get('final_gpa', 0), 'Credits': r.get('total_credit_hours', 0)}
+                            for r in gpa_store.student_records(keys)]
+                timeline += [{'Date': r.get('timestamp', ''), 'Type': 'CGPA', 'Name': r.get('user_name', ''),
+                              'Result': r.get('final_cgpa', 0), 'Credits': r.get('total_credit_hours', 0)}
+                             for r in cgpa_store.student_records(keys)]
+                timeline.sort(key=lambda row: row['Date'])
+                
+                if timeline:
+                    history_df = pd.DataFrame(timeline)
+                    st.subheader("📈 Trend")
+                    st.line_chart(history_df.pivot_table(index='Date', columns='Type', values='Result'))
+                    st.subheader("📋 Timeline")
+                    st.dataframe(history_df, use_container_width=True, hide_index=True)
+                
+                if len(keys) > 1:
+                    st.markdown("**Merged Identities:**")
+                    for key in keys:
+                        if key == selected_key:
+                            continue
+                        col1, col2 = st.columns([3, 1])
+                        col1.write(f"`{key}`")
+                        if col2.button("Unmerge", key=f"unmerge_{key}"):
+                            unmerge_student(STUDENT_ALIASES_FILE, key)
+                            st.rerun()
+                
+                # Manual merge into the selected student
+                with st.expander("🔗 Merge Other Students Into This One"):
+                    others = st.multiselect("Students to Merge", [l for l in labels if l != selected_label],
+                                            key="history_merge")
+                    if others and st.button("Merge Selected", key="history_merge_button"):
+                        merge_students(STUDENT_ALIASES_FILE, [labels[l] for l in others], selected_key)
+                        st.rerun()
+            
+            # Dedupe suggestions for names typed differently, found on request
+            with st.expander("🧹 Possible Duplicate Students"):
+                if st.button("🔍 Find Possible Duplicates", key="find_duplicates"):
+                    st.session_state.show_duplicates = True
+                if st.session_state.get('show_duplicates'):
+                    pairs = history_duplicates(gpa_store, cgpa_store)
+                    if not pairs:
+                        st.info("No likely duplicates found.")
+                    for a, b in pairs[:NAME_PAGE_SIZE]:
+                        col1, col2 = st.columns([3, 1])
+                        col1.write(f"{student_label(a)} · {student_label(b)}")
+                        if col2.button("Merge", key=f"dedupe_{a}_{b}"):
+                            # Keep the identity with the most records
+                            source, target = sorted((a, b), key=lambda k: directory[k]['GPA'] + directory[k]['CGPA'])
+                            merge_students(STUDENT_ALIASES_FILE, [source], target)
+                            st.rerun()
+        else:
+            st.info("No student records available yet.")
+    
     elif menu == "👤 Admin Account":
         st.title("Admin Account Management")
         
-        with open(ADMIN_CONFIG_FILE, 'r') as f:
-            current_admin_config = json.load(f)
+        current_admin_config = dict(cached_json(ADMIN_CONFIG_FILE))
         
         with st.form("admin_account"):
             st.subheader("Change Username and Password")
@@ -1235,15 +1501,416 @@ def admin_panel():
         st.session_state.show_admin_login = False
         st.rerun()
 
+# Live GPA preview: each course's (grade points, credit hours) and their
+# running totals, adjusted by the changed course only
+def gpa_preview():
+    if 'gpa_preview' not in st.session_state:
+        st.session_state.gpa_preview = {'courses': {}, 'points': 0.0, 'credits': 0.0}
+    return st.session_state.gpa_preview
+
+def course_grade_points(total_marks, obtained_marks, credit_hours):
+    if total_marks > 0 and credit_hours > 0:
+        _, gpa = get_grade_info(obtained_marks / total_marks * 100)
+        return gpa * credit_hours, credit_hours
+    return 0.0, 0.0
+
+def set_course_preview(i, points=0.0, credits=0.0):
+    preview = gpa_preview()
+    old_points, old_credits = preview['courses'].get(i, (0.0, 0.0))
+    preview['courses'][i] = (points, credits)
+    preview['points'] += points - old_points
+    preview['credits'] += credits - old_credits
+
+def show_gpa_preview(placeholder):
+    preview = gpa_preview()
+    # Totals are adjusted by deltas, so allow for float residue
+    if preview['credits'] > 1e-9:
+        placeholder.info(f"📊 Live preview: GPA **{preview['points'] / preview['credits']:.2f}** "
+                         f"over **{preview['credits']:g}** credit hours")
+    else:
+        placeholder.info("📊 Live preview: enter marks and credit hours to see your GPA")
+
+# One course block of the GPA calculator; as a fragment, typing marks
+# reruns only this block and the preview
+@st.fragment
+def course_inputs(i, preview_placeholder):
+    st.subheader(f"📚 Course {i+1}")
+    
+    # Course name input
+    st.text_input(f"Course Name *", 
+                  placeholder="e.g., Data Structures",
+                  key=f'course_name_{i}')
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        total_marks = st.number_input(f"Total Marks", 
+                                     min_value=0.0, 
+                                     value=100.0,
+                                     key=f'total_{i}')
+    with col2:
+        obtained_marks = st.number_input(f"Obtained Marks", 
+                                        min_value=0.0, 
+                                        max_value=total_marks,
+                                        value=0.0,
+                                        key=f'obtained_{i}')
+    with col3:
+        credit_hours = st.number_input(f"Credit Hours", 
+                                      min_value=0.0,
+                                      value=3.0,
+                                      key=f'credit_{i}')
+    
+    st.markdown("---")
+    
+    # From the values the widgets returned, so a widget reset without a
+    # callback (e.g. Obtained Marks clamped by a lower Total Marks) counts too.
+    # A fragment rerun clears what it wrote to the outside placeholder, so
+    # the preview is redrawn every time (it is O(1)).
+    set_course_preview(i, *course_grade_points(total_marks, obtained_marks, credit_hours))
+    show_gpa_preview(preview_placeholder)
+
+# One semester block of the CGPA calculator
+@st.fragment
+def semester_inputs(i):
+    st.subheader(f"Semester {i+1}")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.number_input(f"Total semester Grade Points", 
+                        min_value=0.0, 
+                        value=0.0,
+                        step=0.01,
+                        key=f'sem_gpa_{i}')
+    with col2:
+        st.number_input(f"Total Semester Credit Hours", 
+                        min_value=0.0,
+                        value=0.0,
+                        key=f'sem_credits_{i}')
+    
+    st.markdown("---")
+
+# GPA calculator tab
+def gpa_calculator_section():
+    st.header("Semester GPA Calculator")
+    
+    # User name input
+    st.subheader("👤 Student Information")
+    user_name = st.text_input("Enter Your Name *", placeholder="e.g., M.Moiz", key='gpa_user_name')
+    roll_number = st.text_input("Roll Number (optional)", placeholder="e.g., CSC-22F-001",
+                                key='gpa_roll_number')
+    
+    st.markdown("---")
+    
+    # Initialize session state
+    if 'num_courses' not in st.session_state:
+        st.session_state.num_courses = 1
+    
+    # Number of courses
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        num_courses = st.number_input("How many courses do you have?", 
+                                      min_value=1, max_value=MAX_COURSES, 
+                                      value=st.session_state.num_courses,
+                                      key='courses_input')
+        st.session_state.num_courses = num_courses
+    
+    # Course inputs
+    courses_data = []
+    
+    # Each course block is its own fragment (own container, so its own id);
+    # the values are read back from the widget state
+    courses_area = st.container()
+    preview_placeholder = st.empty()
+    preview = gpa_preview()
+    for i in range(num_courses):
+        with courses_area, st.container():
+            course_inputs(i, preview_placeholder)
+        courses_data.append({
+            'course_name': st.session_state[f'course_name_{i}'] or f"Course {i+1}",
+            'total_marks': st.session_state[f'total_{i}'],
+            'obtained_marks': st.session_state[f'obtained_{i}'],
+            'credit_hours': st.session_state[f'credit_{i}']
+        })
+    for i in [i for i in preview['courses'] if i >= num_courses]:
+        set_course_preview(i)
+        del preview['courses'][i]
+    show_gpa_preview(preview_placeholder)
+    
+    # Calculate button
+    if st.button("🧮 Calculate GPA", type="primary", key='calc_gpa'):
+        if not user_name:
+            st.warning("⚠️ Please enter your name to continue")
+        else:
+            # Same calculation as the HTTP API
+            gpa_result = calculate_gpa(courses_data)
+            total_grade_points = gpa_result['total_grade_points']
+            total_credit_hours = gpa_result['total_credit_hours']
+            course_results = [{
+                'Course Name': course['course_name'],
+                'Total Marks': course['total_marks'],
+                'Obtained Marks': course['obtained_marks'],
+                'Percentage': f"{course['percentage']:.2f}%",
+                'Credit Hours': course['credit_hours'],
+                'Grade': course['grade'],
+                'GPA': course['gpa'],
+                'Grade Points': f"{course['grade_points']:.2f}"
+            } for course in gpa_result['courses']]
+            
+            if total_credit_hours > 0:
+                final_gpa = gpa_result['final_gpa']
+                
+                # Display results
+                st.success(f"✅ GPA Calculated Successfully for {user_name}!")
+                
+                # Results table
+                st.subheader("📊 Course-wise Results")
+                import pandas as pd
+                df = pd.DataFrame(course_results)
+                st.dataframe(df, use_container_width=True)
+                
+                # Summary metrics
+                st.subheader("📈 Summary")
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    st.markdown(f"""
+                        <div class="metric-card">
+                            <h3>Total Credit Hours</h3>
+                            <h2>{total_credit_hours:.2f}</h2>
+                        </div>
+                    """, unsafe_allow_html=True)
+                
+                with col2:
+                    st.markdown(f"""
+                        <div class="metric-card">
+                            <h3>Total Grade Points</h3>
+                            <h2>{total_grade_points:.2f}</h2>
+                        </div>
+                    """, unsafe_allow_html=True)
+                
+                with col3:
+                    st.markdown(f"""
+                        <div class="metric-card">
+                            <h3>Semester GPA</h3>
+                            <h2>{final_gpa:.2f}</h2>
+                        </div>
+                    """, unsafe_allow_html=True)
+                
+                # Save to JSON
+                gpa_record = build_record(gpa_result, user_name, roll_number)
+                
+                # Append new record to the journal (shed when too many arrive at once)
+                if not save_submission(STUDENT_GPA_FILE, gpa_record):
+                    st.warning("⏳ Too many submissions right now, so this result was not saved. "
+                               "Please press Calculate again in a few seconds.")
+                
+                st.info("❤ Thank You! For using the SMIU Semester GPA Calculator.")
+                
+                # Export options
+                st.subheader("📥 Download Report")
+                
+                # Export to CSV for student
+                export_data = {
+                    'courses': course_results,
+                    'summary': {
+                        'gpa': final_gpa,
+                        'total_credit_hours': total_credit_hours,
+                        'total_grade_points': total_grade_points,
+                        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    }
+                }
+                
+                summary_csv, courses_csv = export_to_csv(export_data, 'GPA', user_name)
+                
+                st.markdown("**Download Reports:**")
+                
+                if summary_csv:
+                    st.download_button(
+                        label="📄 Download Summary CSV",
+                        data=summary_csv,
+                        file_name=f"GPA_Summary_{user_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                        mime="text/csv"
+                    )
+                
+                if courses_csv:
+                    st.download_button(
+                        label="📄 Download Course Details CSV",
+                        data=courses_csv,
+                        file_name=f"GPA_Courses_{user_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                        mime="text/csv"
+                    )
+                
+                from exporters import student_report_xlsx
+                st.download_button(
+                    label="📗 Download Excel Report",
+                    data=student_report_xlsx(gpa_record, 'GPA', user_name),
+                    file_name=f"GPA_Report_{user_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
+            else:
+                st.error("❌ Please enter valid credit hours!")
+
+# CGPA calculator tab
+def cgpa_calculator_section():
+    st.header("Overall CGPA Calculator")
+    
+    # User name input
+    st.subheader("👤 Student Information")
+    user_name_cgpa = st.text_input("Enter Your Name *", placeholder="e.g., M.Moiz", key='cgpa_user_name')
+    roll_number_cgpa = st.text_input("Roll Number (optional)", placeholder="e.g., CSC-22F-001",
+                                     key='cgpa_roll_number')
+    
+    st.markdown("---")
+    
+    # Initialize session state
+    if 'num_semesters' not in st.session_state:
+        st.session_state.num_semesters = 1
+    
+    # Number of semesters
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        num_semesters = st.number_input("How many semesters do you want to calculate?", 
+                                        min_value=1, max_value=MAX_SEMESTERS, 
+                                        value=st.session_state.num_semesters,
+                                        key='semesters_input')
+        st.session_state.num_semesters = num_semesters
+    
+    # Semester inputs
+    semesters_data = []
+    
+    for i in range(num_semesters):
+        with st.container():
+            semester_inputs(i)
+        semesters_data.append({
+            'gpa': st.session_state[f'sem_gpa_{i}'],
+            'credit_hours': st.session_state[f'sem_credits_{i}']
+        })
+    
+    # Calculate button
+    if st.button("🧮 Calculate CGPA", type="primary", key='calc_cgpa'):
+        if not user_name_cgpa:
+            st.warning("⚠️ Please enter your name to continue")
+        else:
+            # Same calculation as the HTTP API
+            cgpa_result = calculate_cgpa(semesters_data)
+            total_grade_points = cgpa_result['total_grade_points']
+            total_credit_hours = cgpa_result['total_credit_hours']
+            semester_results = [{
+                'Semester': f"Semester {semester['semester_number']}",
+                'GPA': f"{semester['semester_gpa']:.2f}",
+                'Credit Hours': semester['credit_hours'],
+                'Grade Points': f"{semester['grade_points']:.2f}"
+            } for semester in cgpa_result['semesters']]
+            
+            if total_credit_hours > 0:
+                final_cgpa = cgpa_result['final_cgpa']
+                
+                # Display results
+                st.success(f"✅ CGPA Calculated Successfully for {user_name_cgpa}!")
+                
+                # Results table
+                st.subheader("📊 Semester-wise Results")
+                import pandas as pd
+                df = pd.DataFrame(semester_results)
+                st.dataframe(df, use_container_width=True)
+                
+                # Summary metrics
+                st.subheader("📈 Summary")
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    st.markdown(f"""
+                        <div class="metric-card">
+                            <h3>Total Credit Hours</h3>
+                            <h2>{total_credit_hours:.2f}</h2>
+                        </div>
+                    """, unsafe_allow_html=True)
+                
+                with col2:
+                    st.markdown(f"""
+                        <div class="metric-card">
+                            <h3>Total Grade Points</h3>
+                            <h2>{total_grade_points:.2f}</h2>
+                        </div>
+                    """, unsafe_allow_html=True)
+                
+                with col3:
+                    st.markdown(f"""
+                        <div class="metric-card">
+                            <h3>Overall CGPA</h3>
+                            <h2>{final_cgpa:.2f}</h2>
+                        </div>
+                    """, unsafe_allow_html=True)
+                
+                # Save to JSON
+                cgpa_record = build_record(cgpa_result, user_name_cgpa, roll_number_cgpa)
+                
+                # Append new record to the journal (shed when too many arrive at once)
+                if not save_submission(STUDENT_CGPA_FILE, cgpa_record):
+                    st.warning("⏳ Too many submissions right now, so this result was not saved. "
+                               "Please press Calculate again in a few seconds.")
+                
+                st.info("❤ Thank You! For using the SMIU CGPA Calculator.")
+                
+                # Export options
+                st.subheader("📥 Download Report")
+                
+                # Export to CSV for student
+                export_data = {
+                    'semesters': semester_results,
+                    'summary': {
+                        'cgpa': final_cgpa,
+                        'total_credit_hours': total_credit_hours,
+                        'total_grade_points': total_grade_points,
+                        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    }
+                }
+                
+                summary_csv, semesters_csv = export_to_csv(export_data, 'CGPA', user_name_cgpa)
+                
+                st.markdown("**Download Reports:**")
+                
+                if summary_csv:
+                    st.download_button(
+                        label="📄 Download Summary CSV",
+                        data=summary_csv,
+                        file_name=f"CGPA_Summary_{user_name_cgpa}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                        mime="text/csv"
+                    )
+                
+                if semesters_csv:
+                    st.download_button(
+                        label="📄 Download Semester Details CSV",
+                        data=semesters_csv,
+                        file_name=f"CGPA_Semesters_{user_name_cgpa}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                        mime="text/csv"
+                    )
+                
+                from exporters import student_report_xlsx
+                st.download_button(
+                    label="📗 Download Excel Report",
+                    data=student_report_xlsx(cgpa_record, 'CGPA', user_name_cgpa),
+                    file_name=f"CGPA_Report_{user_name_cgpa}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
+            else:
+                st.error("❌ Please enter valid credit hours!")
+
+# Grading scale tab
+def grading_scale_section():
+    st.header("📋 Grading Scale Reference")
+    
+    st.dataframe(grading_scale_frame(), use_container_width=True, hide_index=True)
+    
+    st.info("""
+    **Note:** 
+    - GPA = Sum of (Grade Points × Credit Hours) / Total Credit Hours
+    - CGPA = Sum of (Semester GPA × Semester Credit Hours) / Total Credit Hours
+    """)
+
 # Student GPA Calculator Interface with Short URL Access
 def student_calculator_interface(short_code=None):
-    st.markdown(f"""
-        <div class="main-header" style="text-align: center;">
-         <img src="https://www.smiu.edu.pk/themes/smiu/images/13254460_710745915734761_8157428650049174152_n.png" width="200">
-            <h1>SMIU GPA & CGPA Calculator</h1>
-            <p>Calculate your GPA and CGPA</p>
-        </div>
-    """, unsafe_allow_html=True)
+    st.markdown(HEADER_HTML, unsafe_allow_html=True)
     
     # Show access code if provided
     if short_code:
@@ -1252,412 +1919,47 @@ def student_calculator_interface(short_code=None):
     # Tabs for student calculator
     tab1, tab2, tab3 = st.tabs(["📊 GPA Calculator", "📈 CGPA Calculator", "📋 Grading Scale"])
     
-    # ============= GPA CALCULATOR =============
     with tab1:
-        st.header("Semester GPA Calculator")
-        
-        # User name input
-        st.subheader("👤 Student Information")
-        user_name = st.text_input("Enter Your Name *", placeholder="e.g., M.Moiz", key='gpa_user_name')
-        
-        st.markdown("---")
-        
-        # Initialize session state
-        if 'num_courses' not in st.session_state:
-            st.session_state.num_courses = 1
-        
-        # Number of courses
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            num_courses = st.number_input("How many courses do you have?", 
-                                          min_value=1, max_value=20, 
-                                          value=st.session_state.num_courses,
-                                          key='courses_input')
-            st.session_state.num_courses = num_courses
-        
-        # Course inputs
-        courses_data = []
-        
-        for i in range(num_courses):
-            st.subheader(f"📚 Course {i+1}")
-            
-            # Course name input
-            course_name = st.text_input(f"Course Name *", 
-                                        placeholder="e.g., Data Structures",
-                                        key=f'course_name_{i}')
-            
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                total_marks = st.number_input(f"Total Marks", 
-                                             min_value=0.0, 
-                                             value=100.0,
-                                             key=f'total_{i}')
-            with col2:
-                obtained_marks = st.number_input(f"Obtained Marks", 
-                                                min_value=0.0, 
-                                                max_value=total_marks,
-                                                value=0.0,
-                                                key=f'obtained_{i}')
-            with col3:
-                credit_hours = st.number_input(f"Credit Hours", 
-                                              min_value=0.0,
-                                              value=3.0,
-                                              key=f'credit_{i}')
-            
-            courses_data.append({
-                'course_name': course_name if course_name else f"Course {i+1}",
-                'total_marks': total_marks,
-                'obtained_marks': obtained_marks,
-                'credit_hours': credit_hours
-            })
-            
-            st.markdown("---")
-        
-        # Calculate button
-        if st.button("🧮 Calculate GPA", type="primary", key='calc_gpa'):
-            if not user_name:
-                st.warning("⚠️ Please enter your name to continue")
-            else:
-                total_grade_points = 0
-                total_credit_hours = 0
-                course_results = []
-                course_db_data = []
-                
-                for i, course in enumerate(courses_data):
-                    if course['total_marks'] > 0 and course['credit_hours'] > 0:
-                        percentage = (course['obtained_marks'] / course['total_marks']) * 100
-                        grade, gpa = get_grade_info(percentage)
-                        grade_points = gpa * course['credit_hours']
-                        
-                        total_grade_points += grade_points
-                        total_credit_hours += course['credit_hours']
-                        
-                        course_results.append({
-                            'Course Name': course['course_name'],
-                            'Total Marks': course['total_marks'],
-                            'Obtained Marks': course['obtained_marks'],
-                            'Percentage': f"{percentage:.2f}%",
-                            'Credit Hours': course['credit_hours'],
-                            'Grade': grade,
-                            'GPA': gpa,
-                            'Grade Points': f"{grade_points:.2f}"
-                        })
-                        
-                        course_db_data.append({
-                            'course_name': course['course_name'],
-                            'total_marks': float(course['total_marks']),
-                            'obtained_marks': float(course['obtained_marks']),
-                            'credit_hours': float(course['credit_hours']),
-                            'percentage': float(percentage),
-                            'grade': grade,
-                            'gpa': float(gpa),
-                            'grade_points': float(grade_points)
-                        })
-                
-                if total_credit_hours > 0:
-                    final_gpa = total_grade_points / total_credit_hours
-                    
-                    # Display results
-                    st.success(f"✅ GPA Calculated Successfully for {user_name}!")
-                    
-                    # Results table
-                    st.subheader("📊 Course-wise Results")
-                    df = pd.DataFrame(course_results)
-                    st.dataframe(df, use_container_width=True)
-                    
-                    # Summary metrics
-                    st.subheader("📈 Summary")
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        st.markdown(f"""
-                            <div class="metric-card">
-                                <h3>Total Credit Hours</h3>
-                                <h2>{total_credit_hours:.2f}</h2>
-                            </div>
-                        """, unsafe_allow_html=True)
-                    
-                    with col2:
-                        st.markdown(f"""
-                            <div class="metric-card">
-                                <h3>Total Grade Points</h3>
-                                <h2>{total_grade_points:.2f}</h2>
-                            </div>
-                        """, unsafe_allow_html=True)
-                    
-                    with col3:
-                        st.markdown(f"""
-                            <div class="metric-card">
-                                <h3>Semester GPA</h3>
-                                <h2>{final_gpa:.2f}</h2>
-                            </div>
-                        """, unsafe_allow_html=True)
-                    
-                    # Save to JSON
-                    gpa_record = {
-                        'user_name': user_name,
-                        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        'courses': course_db_data,
-                        'final_gpa': float(final_gpa),
-                        'total_credit_hours': float(total_credit_hours),
-                        'total_grade_points': float(total_grade_points)
-                    }
-                    
-                    # Load existing data and append new record
-                    gpa_data = load_data(STUDENT_GPA_FILE)
-                    gpa_data.append(gpa_record)
-                    save_data(STUDENT_GPA_FILE, gpa_data)
-                    
-                    st.info("❤ Thank You! For using the SMIU Semester GPA Calculator.")
-                    
-                    # Export options
-                    st.subheader("📥 Download Report")
-                    
-                    # Export to CSV for student
-                    export_data = {
-                        'courses': course_results,
-                        'summary': {
-                            'gpa': final_gpa,
-                            'total_credit_hours': total_credit_hours,
-                            'total_grade_points': total_grade_points,
-                            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        }
-                    }
-                    
-                    summary_csv, courses_csv = export_to_csv(export_data, 'GPA', user_name)
-                    
-                    st.markdown("**Download Reports:**")
-                    
-                    if summary_csv:
-                        st.download_button(
-                            label="📄 Download Summary CSV",
-                            data=summary_csv,
-                            file_name=f"GPA_Summary_{user_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                            mime="text/csv"
-                        )
-                    
-                    if courses_csv:
-                        st.download_button(
-                            label="📄 Download Course Details CSV",
-                            data=courses_csv,
-                            file_name=f"GPA_Courses_{user_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                            mime="text/csv"
-                        )
-                else:
-                    st.error("❌ Please enter valid credit hours!")
+        gpa_calculator_section()
     
-    # ============= CGPA CALCULATOR =============
     with tab2:
-        st.header("Overall CGPA Calculator")
-        
-        # User name input
-        st.subheader("👤 Student Information")
-        user_name_cgpa = st.text_input("Enter Your Name *", placeholder="e.g., M.Moiz", key='cgpa_user_name')
-        
-        st.markdown("---")
-        
-        # Initialize session state
-        if 'num_semesters' not in st.session_state:
-            st.session_state.num_semesters = 1
-        
-        # Number of semesters
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            num_semesters = st.number_input("How many semesters do you want to calculate?", 
-                                            min_value=1, max_value=8, 
-                                            value=st.session_state.num_semesters,
-                                            key='semesters_input')
-            st.session_state.num_semesters = num_semesters
-        
-        # Semester inputs
-        semesters_data = []
-        
-        for i in range(num_semesters):
-            st.subheader(f"Semester {i+1}")
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                semester_gpa = st.number_input(f"Total semester Grade Points", 
-                                              min_value=0.0, 
-                                              value=0.0,
-                                              step=0.01,
-                                              key=f'sem_gpa_{i}')
-            with col2:
-                semester_credits = st.number_input(f"Total Semester Credit Hours", 
-                                                  min_value=0.0,
-                                                  value=0.0,
-                                                  key=f'sem_credits_{i}')
-            
-            semesters_data.append({
-                'gpa': semester_gpa,
-                'credit_hours': semester_credits
-            })
-            
-            st.markdown("---")
-        
-        # Calculate button
-        if st.button("🧮 Calculate CGPA", type="primary", key='calc_cgpa'):
-            if not user_name_cgpa:
-                st.warning("⚠️ Please enter your name to continue")
-            else:
-                total_grade_points = 0
-                total_credit_hours = 0
-                semester_results = []
-                semester_db_data = []
-                
-                for i, semester in enumerate(semesters_data):
-                    if semester['credit_hours'] > 0:
-                        grade_points = semester['gpa'] * semester['credit_hours']
-                        
-                        total_grade_points += grade_points
-                        total_credit_hours += semester['credit_hours']
-                        
-                        semester_results.append({
-                            'Semester': f"Semester {i+1}",
-                            'GPA': f"{semester['gpa']:.2f}",
-                            'Credit Hours': semester['credit_hours'],
-                            'Grade Points': f"{grade_points:.2f}"
-                        })
-                        
-                        semester_db_data.append({
-                            'semester_number': i + 1,
-                            'semester_gpa': float(semester['gpa']),
-                            'credit_hours': float(semester['credit_hours']),
-                            'grade_points': float(grade_points)
-                        })
-                
-                if total_credit_hours > 0:
-                    final_cgpa = total_grade_points / total_credit_hours
-                    
-                    # Display results
-                    st.success(f"✅ CGPA Calculated Successfully for {user_name_cgpa}!")
-                    
-                    # Results table
-                    st.subheader("📊 Semester-wise Results")
-                    df = pd.DataFrame(semester_results)
-                    st.dataframe(df, use_container_width=True)
-                    
-                    # Summary metrics
-                    st.subheader("📈 Summary")
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        st.markdown(f"""
-                            <div class="metric-card">
-                                <h3>Total Credit Hours</h3>
-                                <h2>{total_credit_hours:.2f}</h2>
-                            </div>
-                        """, unsafe_allow_html=True)
-                    
-                    with col2:
-                        st.markdown(f"""
-                            <div class="metric-card">
-                                <h3>Total Grade Points</h3>
-                                <h2>{total_grade_points:.2f}</h2>
-                            </div>
-                        """, unsafe_allow_html=True)
-                    
-                    with col3:
-                        st.markdown(f"""
-                            <div class="metric-card">
-                                <h3>Overall CGPA</h3>
-                                <h2>{final_cgpa:.2f}</h2>
-                            </div>
-                        """, unsafe_allow_html=True)
-                    
-                    # Save to JSON
-                    cgpa_record = {
-                        'user_name': user_name_cgpa,
-                        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        'semesters': semester_db_data,
-                        'final_cgpa': float(final_cgpa),
-                        'total_credit_hours': float(total_credit_hours),
-                        'total_grade_points': float(total_grade_points)
-                    }
-                    
-                    # Load existing data and append new record
-                    cgpa_data = load_data(STUDENT_CGPA_FILE)
-                    cgpa_data.append(cgpa_record)
-                    save_data(STUDENT_CGPA_FILE, cgpa_data)
-                    
-                    st.info("❤ Thank You! For using the SMIU CGPA Calculator.")
-                    
-                    # Export options
-                    st.subheader("📥 Download Report")
-                    
-                    # Export to CSV for student
-                    export_data = {
-                        'semesters': semester_results,
-                        'summary': {
-                            'cgpa': final_cgpa,
-                            'total_credit_hours': total_credit_hours,
-                            'total_grade_points': total_grade_points,
-                            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        }
-                    }
-                    
-                    summary_csv, semesters_csv = export_to_csv(export_data, 'CGPA', user_name_cgpa)
-                    
-                    st.markdown("**Download Reports:**")
-                    
-                    if summary_csv:
-                        st.download_button(
-                            label="📄 Download Summary CSV",
-                            data=summary_csv,
-                            file_name=f"CGPA_Summary_{user_name_cgpa}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                            mime="text/csv"
-                        )
-                    
-                    if semesters_csv:
-                        st.download_button(
-                            label="📄 Download Semester Details CSV",
-                            data=semesters_csv,
-                            file_name=f"CGPA_Semesters_{user_name_cgpa}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                            mime="text/csv"
-                        )
-                else:
-                    st.error("❌ Please enter valid credit hours!")
+        cgpa_calculator_section()
     
-    # ============= GRADING SCALE =============
     with tab3:
-        st.header("📋 Grading Scale Reference")
-        
-        grade_df = pd.DataFrame(GRADE_TABLE, columns=['Min %', 'Max %', 'Letter Grade', 'Grade Point'])
-        grade_df['Percentage Range'] = grade_df.apply(lambda x: f"{x['Min %']}% - {x['Max %']}%", axis=1)
-        
-        display_df = grade_df[['Percentage Range', 'Letter Grade', 'Grade Point']]
-        
-        st.dataframe(display_df, use_container_width=True, hide_index=True)
-        
-        st.info("""
-        **Note:** 
-        - GPA = Sum of (Grade Points × Credit Hours) / Total Credit Hours
-        - CGPA = Sum of (Semester GPA × Semester Credit Hours) / Total Credit Hours
-        """)
+        grading_scale_section()
     
     # Footer
     st.markdown("---")
-    st.markdown(f"""
-        <div style='text-align: center; color: #666;'>
-            <p>Made By Muhammad Moiz | SMIU GPA & CGPA Management System</p>
-        </div>
-    """, unsafe_allow_html=True)
+    st.markdown(FOOTER_HTML, unsafe_allow_html=True)
 
 # Handle student access
 def handle_student_access(student_code):
     """Handle student access with short code"""
-    # Load URL data to check if code is valid
-    with open(URL_SHORTENER_FILE, 'r') as f:
-        url_data = json.load(f)
+    # Check the code against the compact in-memory code index; expiry and
+    # use limits are checked here, before the sweeper retires the code
+    status = lookup_code_status(SHORT_CODE_INDEX_FILE, student_code,
+                                datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
     
-    short_codes = url_data.get("short_codes", {})
+    # A session that already took one of the code's uses keeps it; only
+    # expiry applies to it
+    used_codes = st.session_state.setdefault('used_codes', set())
+    if status == "used_up" and student_code in used_codes:
+        status = "active"
     
-    if student_code in short_codes:
-        if short_codes[student_code].get("status") == "active":
+    # One use and one visit per session, not per rerun
+    if status == "active" and student_code not in used_codes:
+        if claim_code_use(SHORT_CODE_INDEX_FILE, student_code):
+            used_codes.add(student_code)
+            get_access_counters(SHORT_CODE_STATS_FILE).record_visit(student_code, datetime.now().hour)
+        else:
+            status = "used_up"
+    
+    if status is not None:
+        if status == "active":
+            st.session_state.access_code = student_code
             student_calculator_interface(student_code)
         else:
-            show_deactivated_message()
+            show_deactivated_message(expired=status in ("expired", "used_up"))
     else:
         st.error("❌ Invalid or expired student URL!")
         st.info("Please contact admin for a valid access URL.")
@@ -1669,6 +1971,9 @@ def handle_student_access(student_code):
 
 # Main App Logic
 def main():
+    init_data_files()
+    start_code_sweeper()
+    
     # Check for student code in query parameters
     query_params = st.query_params
     
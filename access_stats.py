@@ -0,0 +1,127 @@
+"""Per-code usage of the student access links.
+
+Student requests only bump in-memory counters (one lock, no I/O). A daemon
+thread folds the pending counts into the stats file every
+``flush_interval`` seconds with a single locked read-merge-write, so a burst
+of visits costs one write instead of one per visit. The stats file maps
+
+    code -> {"visits": n, "calculations": n, "visit_hours": {"0".."23": n}}
+
+Counts still in memory when the process dies are lost; they are analytics,
+not records. Readers see the file plus this process's pending counts.
+"""
+import atexit
+import threading
+import time
+
+from storage import atomic_write_json, cached_json, file_lock, read_json
+
+FLUSH_INTERVAL_SECONDS = 30
+EVENTS = ("visits", "calculations")
+
+
+def new_code_stats():
+    return {"visits": 0, "calculations": 0, "visit_hours": {}}
+
+
+def merge_code_stats(stats, delta):
+    """Add the counts of ``delta`` into ``stats`` in place"""
+    for code, counts in delta.items():
+        target = stats.setdefault(code, new_code_stats())
+        for event in EVENTS:
+            target[event] += counts[event]
+        for hour, n in counts["visit_hours"].items():
+            target["visit_hours"][hour] = target["visit_hours"].get(hour, 0) + n
+    return stats
+
+
+class AccessCounters:
+    """Buffered visit / calculation counters for one stats file"""
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL_SECONDS):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def _start_flusher(self):
+        def flush_forever():
+            while True:
+                time.sleep(self.flush_interval)
+                try:
+                    self.flush()
+                except Exception:
+                    pass  # counts stay pending until the next round
+
+        self._flusher = threading.Thread(target=flush_forever, name="access-stats-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def _record(self, code, event, hour=None):
+        with self._lock:
+            if self._flusher is None:
+                self._start_flusher()
+            counts = self._pending.setdefault(code, new_code_stats())
+            counts[event] += 1
+            if hour is not None:
+                counts["visit_hours"][hour] = counts["visit_hours"].get(hour, 0) + 1
+
+    def record_visit(self, code, hour):
+        self._record(code, "visits", str(hour))
+
+    def record_calculation(self, code):
+        self._record(code, "calculations")
+
+    def pending(self):
+        with self._lock:
+            return merge_code_stats({}, self._pending)
+
+    def flush(self):
+        """Write the pending counts in one batch; returns how many codes were flushed"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            with file_lock(self.path):
+                stats = merge_code_stats(read_json(self.path, {}), pending)
+                atomic_write_json(self.path, stats, indent=None)
+        except BaseException:
+            with self._lock:  # put them back for the next flush
+                self._pending = merge_code_stats(pending, self._pending)
+            raise
+        return len(pending)
+
+    def load(self):
+        """code -> counts, flushed plus pending. Treat as read-only."""
+        stats = cached_json(self.path, {})
+        pending = self.pending()
+        if not pending:
+            return stats
+        return merge_code_stats(merge_code_stats({}, stats), pending)
+
+
+# Visits per hour of day (0-23) summed over ``stats``
+def visits_by_hour(stats):
+    hours = [0] * 24
+    for counts in stats.values():
+        for hour, n in counts["visit_hours"].items():
+            hours[int(hour)] += n
+    return hours
+
+
+def conversion_rate(counts):
+    return counts["calculations"] / counts["visits"] if counts["visits"] else 0.0
+
+
+_counters = {}
+_counters_lock = threading.Lock()
+
+
+def get_access_counters(path):
+    """The process-wide counters for the stats file at ``path``"""
+    with _counters_lock:
+        if path not in _counters:
+            _counters[path] = AccessCounters(path)
+        return _counters[path]
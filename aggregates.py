@@ -0,0 +1,82 @@
+"""Running aggregates for the admin dashboard.
+
+Each record store keeps a small stats document next to its records that is
+updated on every append: a record counter, a bounded ring buffer of the most
+recent records, submissions per day and a histogram of the final GPA/CGPA
+(rounded to 2 decimals, so at most 401 buckets). The dashboard renders from
+this document in constant time instead of scanning the full history.
+"""
+
+RECENT_LIMIT = 10
+VALUE_FIELDS = ('final_gpa', 'final_cgpa')
+SUMMARY_FIELDS = ('user_name', 'timestamp') + VALUE_FIELDS
+
+
+def new_stats():
+    return {'count': 0, 'recent': [], 'per_day': {}, 'value_sum': 0.0, 'histogram': {}}
+
+
+def _record_value(record):
+    for field in VALUE_FIELDS:
+        if field in record:
+            return float(record[field])
+    return None
+
+
+def add_record(stats, record):
+    """Fold one record into ``stats`` in place"""
+    stats['count'] += 1
+    stats['recent'].append({f: record[f] for f in SUMMARY_FIELDS if f in record})
+    if len(stats['recent']) > RECENT_LIMIT:
+        del stats['recent'][0]
+    day = str(record.get('timestamp', ''))[:10]
+    if day:
+        stats['per_day'][day] = stats['per_day'].get(day, 0) + 1
+    value = _record_value(record)
+    if value is not None:
+        stats['value_sum'] += value
+        bucket = f"{value:.2f}"
+        stats['histogram'][bucket] = stats['histogram'].get(bucket, 0) + 1
+    return stats
+
+
+def build_stats(records):
+    stats = new_stats()
+    for record in records:
+        add_record(stats, record)
+    return stats
+
+
+def merge_stats(stats, delta):
+    """Stats for the records of ``stats`` followed by those of ``delta``"""
+    merged = new_stats()
+    merged['count'] = stats['count'] + delta['count']
+    merged['recent'] = (stats['recent'] + delta['recent'])[-RECENT_LIMIT:]
+    merged['value_sum'] = stats['value_sum'] + delta['value_sum']
+    for key in ('per_day', 'histogram'):
+        merged[key] = dict(stats[key])
+        for bucket, n in delta[key].items():
+            merged[key][bucket] = merged[key].get(bucket, 0) + n
+    return merged
+
+
+def stats_mean(stats):
+    n = sum(stats['histogram'].values())
+    return stats['value_sum'] / n if n else None
+
+
+# Median from the histogram (to 2 decimals, the precision the app displays)
+def stats_median(stats):
+    buckets = sorted((float(b), n) for b, n in stats['histogram'].items())
+    total = sum(n for _, n in buckets)
+    if not total:
+        return None
+    lower_rank, upper_rank = (total - 1) // 2, total // 2
+    seen, lower = 0, None
+    for value, n in buckets:
+        seen += n
+        if lower is None and seen > lower_rank:
+            lower = value
+        if seen > upper_rank:
+            return (lower + value) / 2
+    return lower
@@ -0,0 +1,160 @@
+"""Local HTTP JSON API for GPA / CGPA calculations.
+
+    python api.py --port 8502 [--host 127.0.0.1]
+
+Endpoints (JSON in, JSON out):
+
+    GET  /api/health
+    GET  /api/grading-scale
+    POST /api/gpa     {"user_name": "...", "roll_number": "...", "courses": [...], "save": false}
+    POST /api/cgpa    {"user_name": "...", "semesters": [...], "save": false}
+    POST /api/batch   {"requests": [{"type": "gpa", ...}, {"type": "cgpa", ...}]}
+
+Batch items are answered in order, each with either a result or an
+``error``; saved batch records are written with one append per record file.
+Set SMIU_API_TOKEN to require an ``Authorization: Bearer <token>`` header.
+"""
+import argparse
+import hmac
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from calculator import build_record, calculate_cgpa, calculate_gpa
+from grading import GRADE_TABLE
+from storage import get_record_store
+
+DATA_DIR = "data"
+RECORD_FILES = {
+    'gpa': f"{DATA_DIR}/student_gpa_records.json",
+    'cgpa': f"{DATA_DIR}/student_cgpa_records.json",
+}
+CALCULATIONS = {
+    'gpa': ('courses', calculate_gpa, 'final_gpa'),
+    'cgpa': ('semesters', calculate_cgpa, 'final_cgpa'),
+}
+MAX_BODY_BYTES = 1024 * 1024
+MAX_BATCH = 1000
+DEFAULT_PORT = 8502
+
+
+def _calculate(kind, payload):
+    if not isinstance(payload, dict):
+        raise ValueError("Request must be a JSON object")
+    field, calculate, final_field = CALCULATIONS[kind]
+    result = calculate(payload.get(field))
+    if result[final_field] is None:
+        raise ValueError(f"No {field} with credit hours to calculate")
+    record = build_record(result, str(payload.get('user_name') or ''), payload.get('roll_number'))
+    if payload.get('save') and not record['user_name']:
+        raise ValueError("'user_name' is required to save a result")
+    return record
+
+
+def handle_calculation(kind, payload):
+    record = _calculate(kind, payload)
+    if payload.get('save'):
+        get_record_store(RECORD_FILES[kind]).append(record)
+    return record
+
+
+def handle_batch(payload):
+    items = payload.get('requests') if isinstance(payload, dict) else None
+    if not isinstance(items, list):
+        raise ValueError("'requests' must be a list")
+    if len(items) > MAX_BATCH:
+        raise ValueError(f"At most {MAX_BATCH} requests per batch")
+    results = []
+    to_save = {kind: [] for kind in CALCULATIONS}
+    for item in items:
+        kind = item.get('type') if isinstance(item, dict) else None
+        if kind not in CALCULATIONS:
+            results.append({'error': "'type' must be 'gpa' or 'cgpa'"})
+            continue
+        try:
+            record = _calculate(kind, item)
+        except ValueError as e:
+            results.append({'error': str(e)})
+            continue
+        results.append(record)
+        if item.get('save'):
+            to_save[kind].append(record)
+    for kind, records in to_save.items():
+        if records:
+            get_record_store(RECORD_FILES[kind]).append_many(records)
+    return {'results': results}
+
+
+def grading_scale():
+    return [{'min': low, 'max': high, 'grade': grade, 'gpa': gpa}
+            for low, high, grade, gpa in GRADE_TABLE]
+
+
+ROUTES = {
+    ('GET', '/api/health'): lambda payload: {'status': 'ok'},
+    ('GET', '/api/grading-scale'): lambda payload: {'grading_scale': grading_scale()},
+    ('POST', '/api/gpa'): lambda payload: handle_calculation('gpa', payload),
+    ('POST', '/api/cgpa'): lambda payload: handle_calculation('cgpa', payload),
+    ('POST', '/api/batch'): handle_batch,
+}
+
+
+class APIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive for repeated calls
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+    token = None
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _dispatch(self, method):
+        route = ROUTES.get((method, self.path.split('?', 1)[0]))
+        length = self.headers.get('Content-Length') or '0'
+        if not length.isdigit() or int(length) > MAX_BODY_BYTES:
+            self.close_connection = True
+            return self._send(413, {'error': "Request body too large"})
+        body = self.rfile.read(int(length)) if int(length) else b''
+        if self.token and not hmac.compare_digest(self.headers.get('Authorization', '').encode(),
+                                                  f"Bearer {self.token}".encode()):
+            return self._send(401, {'error': "Unauthorized"})
+        if route is None:
+            return self._send(404, {'error': "Not found"})
+        try:
+            payload = json.loads(body) if body else {}
+            return self._send(200, route(payload))
+        except ValueError as e:  # includes malformed JSON
+            return self._send(400, {'error': str(e)})
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host='127.0.0.1', port=DEFAULT_PORT, token=None):
+    handler = type('APIHandler', (APIHandler,), {'token': token})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SMIU GPA & CGPA calculation API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    os.makedirs(DATA_DIR, exist_ok=True)
+    server = make_server(args.host, args.port, os.environ.get("SMIU_API_TOKEN"))
+    print(f"Serving on http://{args.host}:{args.port}/api/")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
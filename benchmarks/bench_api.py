@@ -0,0 +1,106 @@
+"""Compare GPA calculations per second through the HTTP API and the Streamlit UI.
+
+    python benchmarks/bench_api.py --seconds 5 --threads 4 --batch 100
+
+The API server runs in-process on an ephemeral port with keep-alive
+connections; the UI path is a full AppTest rerun of the student calculator
+with the "Calculate GPA" button clicked, as a browser interaction would do.
+Both run against a temporary copy of data/.
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from api import make_server  # noqa: E402
+
+COURSES = [{'course_name': f"Course {i}", 'total_marks': 100, 'obtained_marks': 55 + 7 * i,
+            'credit_hours': 3} for i in range(6)]
+
+
+def drive_api(port, path, body, seconds, threads):
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(n):
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        while time.perf_counter() < deadline:
+            conn.request('POST', path, body, {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            assert response.status == 200, response.status
+            counts[n] += 1
+        conn.close()
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def drive_ui(seconds):
+    from streamlit.testing.v1 import AppTest
+
+    with open("data/url_shortener.json") as f:
+        short_codes = json.load(f)["short_codes"]
+        code = next(c for c, details in short_codes.items() if details.get("status") == "active")
+    at = AppTest.from_file(os.path.join(ROOT, "GPA.py"), default_timeout=60)
+    at.query_params["student"] = code
+    at.run()
+    at.text_input(key="gpa_user_name").input("Bench Student")
+    at.number_input(key="courses_input").set_value(len(COURSES))
+    at.run()
+    for i, course in enumerate(COURSES):
+        at.number_input(key=f"obtained_{i}").set_value(float(course['obtained_marks']))
+    runs = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        at.button(key="calc_gpa").click().run()
+        runs += 1
+    return runs / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--skip-ui", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copytree(os.path.join(ROOT, "data"), os.path.join(tmp, "data"),
+                        ignore=shutil.ignore_patterns("exports", "*.lock"))
+        os.chdir(tmp)
+        server = make_server(port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+
+        single = json.dumps({'user_name': "Bench Student", 'courses': COURSES}).encode()
+        rate = drive_api(port, '/api/gpa', single, args.seconds, args.threads)
+        print(f"API /api/gpa:                {rate:10,.0f} requests/s  {rate:10,.0f} calculations/s")
+
+        batch = json.dumps({'requests': [{'type': 'gpa', 'courses': COURSES}] * args.batch}).encode()
+        rate = drive_api(port, '/api/batch', batch, args.seconds, args.threads)
+        print(f"API /api/batch ({args.batch} each):   {rate:10,.0f} requests/s  "
+              f"{rate * args.batch:10,.0f} calculations/s")
+        server.shutdown()
+
+        if not args.skip_ui:
+            rate = drive_ui(args.seconds)
+            print(f"Streamlit UI rerun:          {rate:10,.1f} requests/s  {rate:10,.1f} calculations/s")
+
+
+if __name__ == "__main__":
+    main()
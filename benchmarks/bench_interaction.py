@@ -0,0 +1,101 @@
+"""Measure the server time of one input change in the GPA calculator.
+
+    python benchmarks/bench_interaction.py [--app path/to/checkout] [--courses 20] [--edits 20]
+
+Opens the student page with ``--courses`` course blocks, then changes one
+"Obtained Marks" box at a time and times each resulting script run (the
+script runner only, not AppTest's own bookkeeping). Like the Streamlit
+server, all runs share one compiled-script cache; AppTest would otherwise
+recompile GPA.py on every run. Runs against a temporary copy of the
+checkout's data/ directory.
+
+On Streamlit versions with fragments, each edit is also replayed as a
+fragment rerun of the edited course block, which is what the server does
+when a widget inside the fragment changes.
+"""
+import argparse
+import inspect
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=ROOT, help="checkout containing GPA.py and data/")
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--edits", type=int, default=20)
+    args = parser.parse_args()
+    app_dir = os.path.abspath(args.app)
+    sys.path.insert(0, app_dir)
+    from streamlit.runtime.scriptrunner import script_runner
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import AppTest, local_script_runner
+
+    script_cache = ScriptCache()
+    local_script_runner.ScriptCache = lambda: script_cache
+    timings = []
+    run_script = script_runner.ScriptRunner._run_script
+
+    def timed_run_script(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return run_script(self, *args, **kwargs)
+        finally:
+            timings.append(time.perf_counter() - start)
+
+    script_runner.ScriptRunner._run_script = timed_run_script
+
+    # Share fragment registrations between runs and rerun only the queued fragment
+    has_fragments = 'fragment_storage' in inspect.signature(script_runner.ScriptRunner).parameters
+    fragment_queue = []
+    if has_fragments:
+        fragment_storage = local_script_runner.MemoryFragmentStorage()
+        local_script_runner.MemoryFragmentStorage = lambda: fragment_storage
+        rerun_data = local_script_runner.RerunData
+        local_script_runner.RerunData = lambda **kw: rerun_data(fragment_id_queue=list(fragment_queue), **kw)
+
+    with open(os.path.join(app_dir, "data", "url_shortener.json")) as f:
+        short_codes = json.load(f)["short_codes"]
+        code = next(c for c, details in short_codes.items() if details.get("status") == "active")
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copytree(os.path.join(app_dir, "data"), os.path.join(tmp, "data"),
+                        ignore=shutil.ignore_patterns("exports", "*.lock"))
+        os.chdir(tmp)
+        at = AppTest.from_file(os.path.join(app_dir, "GPA.py"), default_timeout=120)
+        at.query_params["student"] = code
+        # Course blocks are then the first fragments registered, in page order
+        at.session_state["num_courses"] = args.courses
+        at.run()
+        assert not at.exception, [e.value for e in at.exception]
+
+        results = {}
+        for label in ("full rerun", "fragment rerun") if has_fragments else ("full rerun",):
+            samples = []
+            for n in range(args.edits):
+                at.number_input(key=f"obtained_{n % args.courses}").set_value(float(50 + n + len(results)))
+                if label == "fragment rerun":
+                    fragment_queue[:] = [list(fragment_storage._fragments)[n % args.courses]]
+                del timings[:]
+                at.run()
+                samples.append(timings[-1])
+                assert not at.exception, [e.value for e in at.exception]
+                if fragment_queue:
+                    # A fragment run returns only the fragment's elements; refresh the page
+                    fragment_queue[:] = []
+                    at.run()
+            results[label] = sorted(t * 1000 for t in samples)
+
+    for label, samples in results.items():
+        print(f"{args.courses} courses, {args.edits} edits, {label}: median "
+              f"{statistics.median(samples):.1f} ms, p90 {samples[int(len(samples) * 0.9) - 1]:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Time admin name searches against a synthetic record store.
+
+    python benchmarks/bench_name_search.py --records 500000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import get_record_store  # noqa: E402
+
+FIRST = ["Muhammad", "Ali", "Ayesha", "Fatima", "Ahmed", "Zainab", "Hassan", "Sara", "Bilal",
+         "Omar", "Hira", "Usman", "Maryam", "Hamza", "Sana", "Danish", "Iqra", "Faraz"]
+LAST = ["Khan", "Siddiqui", "Shaikh", "Memon", "Baloch", "Qureshi", "Ansari", "Malik",
+        "Chandio", "Soomro", "Abbasi", "Rajput", "Mirza", "Butt"]
+SYLLABLES = ["ka", "ri", "mo", "sha", "den", "lu", "zar", "qi", "bar", "no", "tel", "fa", "ham", "ye", "ro"]
+QUERIES = [("contains", "khan"), ("contains", "ali s"), ("contains", "ridenqi"),
+           ("prefix", "ayesha me"), ("prefix", "zai"), ("fuzzy", "muhamad khaan"),
+           ("fuzzy", "siddiqi"), ("fuzzy", "sara kamoden")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=500_000)
+    parser.add_argument("--backend", default="journal")
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = get_record_store(os.path.join(tmp, "student_gpa_records.json"), args.backend)
+        # Roughly 100k distinct students, a few records each
+        surnames = LAST + [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+        students = [f"{rng.choice(FIRST)} {rng.choice(FIRST)} {rng.choice(surnames)}"
+                    for _ in range(max(args.records // 5, 1))]
+        store.replace({'user_name': rng.choice(students),
+                       'timestamp': '2026-01-01 00:00:00', 'final_gpa': 3.0}
+                      for _ in range(args.records))
+
+        start = time.perf_counter()
+        store.search_names("")
+        print(f"index build: {time.perf_counter() - start:.2f}s for {args.records:,} records")
+
+        store.append({'user_name': "Newly Added Student", 'final_gpa': 3.5})
+        start = time.perf_counter()
+        store.search_names("newly")
+        print(f"sync after one append: {(time.perf_counter() - start) * 1000:.1f} ms (includes reload)")
+
+        for mode, term in QUERIES:
+            index = store.name_index()
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                index._memo.clear()
+                names, total = index.search(term, mode, 0, 50)
+            first_page = (time.perf_counter() - start) / args.repeat * 1000
+            start = time.perf_counter()
+            for page in range(1, args.repeat + 1):
+                index.search(term, mode, page * 50, 50)
+            next_page = (time.perf_counter() - start) / args.repeat * 1000
+            print(f"{mode:8} {term!r:16} {total:8,} matches  first page {first_page:7.3f} ms  "
+                  f"next pages {next_page:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
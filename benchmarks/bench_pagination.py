@@ -0,0 +1,62 @@
+"""Time admin records page switches for small and large record stores.
+
+    python benchmarks/bench_pagination.py --records 1000 1000000 --backend sqlite
+
+"after append" times the first page read after each of ``--appends`` single
+record appends, as when student saves land between admin reruns.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import get_record_store  # noqa: E402
+
+
+def make_records(n, rng):
+    for i in range(n):
+        yield {'user_name': f"student-{rng.randrange(max(n // 5, 1))}",
+               'timestamp': f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 10:00:00",
+               'final_gpa': round(rng.uniform(0, 4), 2), 'total_credit_hours': 18.0,
+               'courses': [{'course_name': f"Course {c}", 'credit_hours': 3.0} for c in range(6)]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, nargs='+', default=[1000, 100_000])
+    parser.add_argument("--backend", default="journal")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=25)
+    parser.add_argument("--appends", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    for n in args.records:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = get_record_store(os.path.join(tmp, "student_gpa_records.json"), args.backend)
+            store.replace(make_records(n, rng))
+            for sort in ('timestamp', 'user_name', 'final_gpa'):
+                start = time.perf_counter()
+                records, cursor, total = store.page(sort, True, args.page_size)
+                first = (time.perf_counter() - start) * 1000
+                start = time.perf_counter()
+                for _ in range(args.pages):
+                    records, cursor, total = store.page(sort, True, args.page_size, cursor)
+                switch = (time.perf_counter() - start) / args.pages * 1000
+                after_append = 0.0
+                for new_record in make_records(args.appends, rng):
+                    store.append(new_record)
+                    start = time.perf_counter()
+                    store.page(sort, True, args.page_size)
+                    after_append += time.perf_counter() - start
+                after_append = after_append / args.appends * 1000
+                print(f"{args.backend:8} {n:>9,} records  sort={sort:10} first page {first:8.1f} ms  "
+                      f"page switch {switch:6.2f} ms  after append {after_append:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Time bulk deactivate and bulk delete on a large short code registry.
+
+    python benchmarks/bench_short_codes.py [--codes 100000] [--batch 1000 10000]
+
+Each batch is one ``url_transaction`` (read, change, write the URL file and
+the code index). "list" replays the old bookkeeping, where a separate
+``active_short_codes`` list was searched and edited per code; "registry" uses
+the status field through ``set_code_status`` / ``delete_codes``.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shortener import delete_codes, set_code_status, url_transaction  # noqa: E402
+from storage import atomic_write_json  # noqa: E402
+
+
+def make_url_data(n, with_list):
+    short_codes = {f"code{i:07d}": {"created_at": "2026-01-01 10:00:00", "created_by": "admin",
+                                    "full_url": f"https://smiumgpa.streamlit.app/?student=code{i:07d}",
+                                    "status": "active", "base_url_used": "https://smiumgpa.streamlit.app"}
+                   for i in range(n)}
+    url_data = {"base_url": "https://smiumgpa.streamlit.app", "short_codes": short_codes}
+    if with_list:
+        url_data["active_short_codes"] = list(short_codes)
+    return url_data
+
+
+def list_deactivate(url_data, codes):
+    for code in codes:
+        url_data["short_codes"][code]["status"] = "inactive"
+        if code in url_data.get("active_short_codes", []):
+            url_data["active_short_codes"].remove(code)
+
+
+def list_delete(url_data, codes):
+    for code in codes:
+        if code in url_data["short_codes"]:
+            del url_data["short_codes"][code]
+        if code in url_data.get("active_short_codes", []):
+            url_data["active_short_codes"].remove(code)
+
+
+def registry_deactivate(url_data, codes):
+    set_code_status(url_data, codes, "inactive")
+
+
+def registry_delete(url_data, codes):
+    delete_codes(url_data, codes)
+
+
+def timed_transaction(url_file, index_file, change, codes):
+    start = time.perf_counter()
+    with url_transaction(url_file, index_file) as url_data:
+        change_start = time.perf_counter()
+        change(url_data, codes)
+        change_time = time.perf_counter() - change_start
+    return (time.perf_counter() - start) * 1000, change_time * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--codes", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, nargs='+', default=[1000, 10_000])
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    for batch in args.batch:
+        for label, deactivate, delete in (("list", list_deactivate, list_delete),
+                                          ("registry", registry_deactivate, registry_delete)):
+            with tempfile.TemporaryDirectory() as tmp:
+                url_file = os.path.join(tmp, "url_shortener.json")
+                index_file = os.path.join(tmp, "short_code_index.json")
+                atomic_write_json(url_file, make_url_data(args.codes, label == "list"))
+                codes = rng.sample(sorted(make_url_data(args.codes, False)["short_codes"]), 2 * batch)
+                for action, change, chosen in (("deactivate", deactivate, codes[:batch]),
+                                               ("delete", delete, codes[batch:])):
+                    total, change_time = timed_transaction(url_file, index_file, change, chosen)
+                    print(f"{args.codes:>9,} codes  {label:8} bulk {action:10} {batch:>6,}: "
+                          f"{total:9.1f} ms transaction, {change_time:9.1f} ms of it changing codes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Measure app startup: first render and rerun times of the student and admin pages.
+
+    python benchmarks/bench_startup.py [--app path/to/checkout] [--repeat 3]
+
+Every measurement runs in a fresh interpreter (so module imports and
+one-time initialization are included in the first render) against a
+temporary copy of the checkout's data/ directory.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, sys, time
+app_dir, page, code = sys.argv[1], sys.argv[2], sys.argv[3]
+sys.path.insert(0, app_dir)
+start = time.perf_counter()
+import streamlit
+from streamlit.testing.v1 import AppTest
+streamlit_import = time.perf_counter() - start
+before = set(sys.modules)
+at = AppTest.from_file(app_dir + "/GPA.py", default_timeout=120)
+if page == "student":
+    at.query_params["student"] = code
+start = time.perf_counter()
+at.run()
+first = time.perf_counter() - start
+assert not at.exception, [e.value for e in at.exception]
+start = time.perf_counter()
+at.run()
+rerun = time.perf_counter() - start
+heavy = sorted(m for m in ("pandas", "numpy", "openpyxl") if m in set(sys.modules) - before)
+print(json.dumps({"streamlit_import": streamlit_import, "first": first, "rerun": rerun,
+                  "imported": heavy}))
+"""
+
+
+def measure(app_dir, page, code, workdir):
+    out = subprocess.run([sys.executable, "-c", CHILD, app_dir, page, code], cwd=workdir,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=ROOT, help="checkout containing GPA.py and data/")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    app_dir = os.path.abspath(args.app)
+
+    with open(os.path.join(app_dir, "data", "url_shortener.json")) as f:
+        short_codes = json.load(f)["short_codes"]
+        code = next(c for c, details in short_codes.items() if details.get("status") == "active")
+    for page in ("student", "admin-login"):
+        runs = []
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory() as tmp:
+                shutil.copytree(os.path.join(app_dir, "data"), os.path.join(tmp, "data"),
+                                ignore=shutil.ignore_patterns("exports", "*.lock"))
+                runs.append(measure(app_dir, page, code, tmp))
+        first = statistics.median(r["first"] for r in runs) * 1000
+        rerun = statistics.median(r["rerun"] for r in runs) * 1000
+        print(f"{page:12} first render {first:7.1f} ms  rerun {rerun:6.1f} ms  "
+              f"(streamlit import {statistics.median(r['streamlit_import'] for r in runs):.2f}s, "
+              f"heavy modules loaded by the app: {', '.join(runs[-1]['imported']) or 'none'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Time a burst of concurrent student saves, one append each vs. the write queue.
+
+    python benchmarks/bench_write_queue.py [--submissions 500] [--threads 50]
+
+Each thread saves its share of records through the journal store. "direct"
+calls ``append`` per record (one lock + fsync each); "queue" submits through
+``WriteQueue``, which writes whatever has piled up as one ``append_many``.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import JournalStore  # noqa: E402
+from submissions import WriteQueue  # noqa: E402
+
+
+def make_record(i):
+    return {"user_name": f"Student {i}", "roll_number": f"R{i:05d}", "final_gpa": 3.0,
+            "timestamp": "2026-01-01 10:00:00", "courses": [], "total_credit_hours": 15}
+
+
+def run_burst(save, submissions, threads):
+    per_thread = submissions // threads
+
+    def worker(offset):
+        for i in range(per_thread):
+            save(make_record(offset + i))
+
+    workers = [threading.Thread(target=worker, args=(t * per_thread,)) for t in range(threads)]
+    start = time.perf_counter()
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+    return (time.perf_counter() - start) * 1000, per_thread * threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--submissions", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=50)
+    args = parser.parse_args()
+
+    for label in ("direct", "queue"):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = JournalStore(os.path.join(tmp, "student_gpa_records.json"))
+            queue = WriteQueue(store)
+            save = store.append if label == "direct" else queue.submit
+            elapsed, saved = run_burst(save, args.submissions, args.threads)
+            assert store.count() == saved
+            line = f"{label:6} {saved:>6,} saves from {args.threads} threads: {elapsed:9.1f} ms"
+            if label == "queue":
+                metrics = queue.metrics()
+                line += (f"  ({metrics['flushes']} flushes, mean batch {metrics['mean_batch']:.1f}, "
+                         f"max depth {metrics['max_depth']}, mean flush {metrics['mean_flush_ms']:.1f} ms)")
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Multi-process stress check for the locked / atomic write path.
+
+Several worker processes append student records through the journal store
+(with a tiny compaction threshold so compaction races with appends) while
+also doing read-modify-write transactions on a shared JSON file. At the end
+every record and every increment must be present.
+
+    python benchmarks/stress_concurrent_writes.py --workers 8 --records 200
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import JournalStore, read_json, transaction  # noqa: E402
+
+
+def worker(data_dir, worker_id, records):
+    store = JournalStore(os.path.join(data_dir, "student_gpa_records.json"), compact_threshold=4096)
+    counter_file = os.path.join(data_dir, "url_shortener.json")
+    for i in range(records):
+        store.append({'user_name': f"worker-{worker_id}", 'seq': i, 'final_gpa': 3.0})
+        with transaction(counter_file, {}) as data:
+            data.setdefault("short_codes", {})[f"w{worker_id}-{i}"] = {"status": "active"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--records", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        JournalStore(os.path.join(data_dir, "student_gpa_records.json")).migrate()
+        start = time.perf_counter()
+        procs = [multiprocessing.Process(target=worker, args=(data_dir, w, args.records))
+                 for w in range(args.workers)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        records = JournalStore(os.path.join(data_dir, "student_gpa_records.json")).load()
+        codes = read_json(os.path.join(data_dir, "url_shortener.json"), {}).get("short_codes", {})
+        expected = args.workers * args.records
+        seen = {(r['user_name'], r['seq']) for r in records}
+
+        print(f"{args.workers} workers x {args.records} writes in {elapsed:.2f}s")
+        print(f"records: {len(records)} stored, {len(seen)} unique, {expected} expected")
+        print(f"transactions: {len(codes)} applied, {expected} expected")
+        ok = len(records) == len(seen) == len(codes) == expected
+        print("OK" if ok else "LOST OR DUPLICATED WRITES")
+        return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""Bulk import of class marks sheets (CSV / Excel) into the GPA records.
+
+Files are read in fixed-size chunks (pandas ``chunksize`` for CSV, openpyxl
+read-only mode for Excel), graded with the vectorized engine and streamed
+into the record store as one bulk append, so memory is bounded by the chunk
+size rather than the file size. Each run of consecutive rows for the same
+student becomes one GPA record, so a student's rows should be contiguous.
+"""
+import time
+import zipfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+from grading import grade_frame
+
+CHUNK_ROWS = 50_000
+MAX_REPORTED_REJECTS = 100
+MARK_COLUMNS = ('total_marks', 'obtained_marks', 'credit_hours')
+REQUIRED_COLUMNS = ('user_name', 'obtained_marks', 'credit_hours')
+COURSE_FIELDS = ('course_name', 'total_marks', 'obtained_marks', 'credit_hours',
+                 'percentage', 'grade', 'gpa', 'grade_points')
+COLUMN_ALIASES = {
+    'name': 'user_name',
+    'student': 'user_name',
+    'student_name': 'user_name',
+    'course': 'course_name',
+    'obtained': 'obtained_marks',
+    'marks': 'obtained_marks',
+    'total': 'total_marks',
+    'credits': 'credit_hours',
+    'credit_hour': 'credit_hours',
+    'roll_no': 'roll_number',
+    'roll': 'roll_number',
+}
+
+
+def _normalize_columns(chunk):
+    names = (str(c).strip().lower().replace(' ', '_') for c in chunk.columns)
+    chunk.columns = [COLUMN_ALIASES.get(name, name) for name in names]
+    missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+    if 'total_marks' not in chunk.columns:
+        chunk['total_marks'] = 100.0
+    if 'course_name' not in chunk.columns:
+        chunk['course_name'] = ''
+    if 'roll_number' not in chunk.columns:
+        chunk['roll_number'] = ''
+    return chunk
+
+
+# Yield (DataFrame chunk, fraction of the file read) from a CSV upload
+def iter_csv_chunks(file, chunk_rows=CHUNK_ROWS):
+    size = getattr(file, 'size', None)
+    for chunk in pd.read_csv(file, chunksize=chunk_rows, skipinitialspace=True):
+        yield chunk, (file.tell() / size if size else 0.0)
+
+
+# Yield (DataFrame chunk, fraction of the file read) from an XLSX upload
+def iter_xlsx_chunks(file, chunk_rows=CHUNK_ROWS):
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException) as e:
+        raise ValueError(f"Not a valid Excel file: {e}")
+    try:
+        sheet = workbook.active
+        total_rows = sheet.max_row or 0
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        batch = []
+        seen = 1
+        for row in rows:
+            seen += 1
+            if all(value is None for value in row):
+                continue
+            batch.append(row)
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame(batch, columns=header), (seen / total_rows if total_rows else 0.0)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header), 1.0
+    finally:
+        workbook.close()
+
+
+def iter_mark_chunks(file, filename, chunk_rows=CHUNK_ROWS):
+    lowered = filename.lower()
+    if lowered.endswith('.csv'):
+        chunks = iter_csv_chunks(file, chunk_rows)
+    elif lowered.endswith(('.xlsx', '.xlsm')):
+        chunks = iter_xlsx_chunks(file, chunk_rows)
+    else:
+        raise ValueError("Unsupported file type, please upload a .csv or .xlsx file")
+    for chunk, fraction in chunks:
+        yield _normalize_columns(chunk), fraction
+
+
+def _gpa_record(user_name, roll_number, courses, timestamp):
+    for position, course in enumerate(courses, start=1):
+        if not course['course_name']:
+            course['course_name'] = f"Course {position}"
+    total_credit_hours = sum(c['credit_hours'] for c in courses)
+    total_grade_points = sum(c['grade_points'] for c in courses)
+    record = {
+        'user_name': user_name,
+        'timestamp': timestamp,
+        'courses': courses,
+        'final_gpa': float(total_grade_points / total_credit_hours),
+        'total_credit_hours': float(total_credit_hours),
+        'total_grade_points': float(total_grade_points),
+    }
+    if roll_number:
+        record['roll_number'] = roll_number
+    return record
+
+
+def _reject_reasons(chunk):
+    """Why each row cannot be graded ('' for a valid row), by the same rules
+    as the calculator form and the API"""
+    marks = {column: chunk[column].to_numpy(dtype=float) for column in MARK_COLUMNS}
+    not_number = np.zeros(len(chunk), dtype=bool)
+    negative = np.zeros(len(chunk), dtype=bool)
+    for values in marks.values():
+        not_number |= ~np.isfinite(values)
+        negative |= values < 0
+    no_name = (chunk['user_name'] == '').to_numpy()
+    conditions = [no_name, not_number, negative,
+                  marks['obtained_marks'] > marks['total_marks'],
+                  (marks['total_marks'] == 0) | (marks['credit_hours'] == 0)]
+    reasons = ["missing student name", "marks or credit hours are not a number",
+               "marks or credit hours are negative", "obtained marks exceed total marks",
+               "total marks or credit hours are zero"]
+    return np.select(conditions, reasons, default='')
+
+
+def iter_gpa_records(chunks, timestamp, stats, progress=None):
+    """Grade chunks and yield one GPA record per run of student rows.
+
+    Rows that fail validation are left out and counted in ``stats['rejected']``;
+    the first MAX_REPORTED_REJECTS go to ``stats['rejected_rows']`` as
+    (sheet row number, reason), counting the header as row 1.
+    """
+    pending = None  # (user_name, roll_number, courses) of a run that may continue in the next chunk
+    for chunk, fraction in chunks:
+        first_row = stats['rows'] + 2
+        stats['rows'] += len(chunk)
+        chunk = chunk.reset_index(drop=True)
+        chunk['user_name'] = chunk['user_name'].fillna('').astype(str).str.strip()
+        chunk['course_name'] = chunk['course_name'].fillna('').astype(str).str.strip()
+        chunk['roll_number'] = chunk['roll_number'].fillna('').astype(str).str.strip()
+        for column in MARK_COLUMNS:
+            chunk[column] = pd.to_numeric(chunk[column], errors='coerce').astype(float)
+
+        reasons = _reject_reasons(chunk)
+        rejected = np.flatnonzero(reasons != '')
+        if len(rejected):
+            stats['rejected'] += len(rejected)
+            room = MAX_REPORTED_REJECTS - len(stats['rejected_rows'])
+            stats['rejected_rows'].extend((first_row + int(i), str(reasons[i])) for i in rejected[:room])
+            chunk = chunk[reasons == '']
+
+        graded = grade_frame(chunk)
+        graded = graded[graded['counted']]
+        names = graded['user_name'].to_numpy()
+        rolls = graded['roll_number'].tolist()
+        columns = {field: graded[field].tolist() for field in COURSE_FIELDS}
+        boundaries = (np.flatnonzero(names[1:] != names[:-1]) + 1).tolist()
+
+        for start, end in zip([0] + boundaries, boundaries + [len(names)]):
+            if start == end:
+                continue
+            courses = [{field: columns[field][i] for field in COURSE_FIELDS} for i in range(start, end)]
+            if pending and pending[0] == names[start]:
+                pending[2].extend(courses)
+                continue
+            if pending:
+                stats['records'] += 1
+                yield _gpa_record(*pending, timestamp)
+            pending = (names[start], rolls[start], courses)
+
+        if progress:
+            progress(stats['rows'], min(fraction, 1.0))
+
+    if pending:
+        stats['records'] += 1
+        yield _gpa_record(*pending, timestamp)
+
+
+def import_marks(file, filename, store, progress=None, chunk_rows=CHUNK_ROWS):
+    """Import a marks sheet into ``store`` and return a throughput report.
+
+    The report also counts the rejected rows and lists the first of them
+    (see ``iter_gpa_records``). ``progress(rows_done, fraction)`` is called
+    after every chunk.
+    """
+    stats = {'rows': 0, 'records': 0, 'rejected': 0, 'rejected_rows': []}
+    start = time.perf_counter()
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    chunks = iter_mark_chunks(file, filename, chunk_rows)
+    store.bulk_append(iter_gpa_records(chunks, timestamp, stats, progress))
+    seconds = time.perf_counter() - start
+    stats['seconds'] = seconds
+    stats['rows_per_sec'] = stats['rows'] / seconds if seconds else 0.0
+    return stats
@@ -0,0 +1,114 @@
+"""GPA / CGPA calculations without any UI.
+
+The Streamlit calculator and the HTTP API (``api.py``) both use these
+functions, so a result is the same whichever way it was computed.
+"""
+import math
+from datetime import datetime
+
+from grading import get_grade_info
+
+MAX_COURSES = 20
+MAX_SEMESTERS = 8
+
+
+def _number(item, field, default):
+    value = item.get(field, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"'{field}' must be a number")
+    if value < 0:
+        raise ValueError(f"'{field}' cannot be negative")
+    return float(value)
+
+
+def _items(items, name, limit):
+    if not isinstance(items, list) or not items:
+        raise ValueError(f"'{name}' must be a non-empty list")
+    if len(items) > limit:
+        raise ValueError(f"At most {limit} {name} are allowed")
+    if not all(isinstance(item, dict) for item in items):
+        raise ValueError(f"Every entry of '{name}' must be an object")
+    return items
+
+
+def calculate_gpa(courses):
+    """Semester GPA for a list of course dicts.
+
+    Each course has ``total_marks``, ``obtained_marks`` and ``credit_hours``
+    (and optionally ``course_name``). Courses without total marks or credit
+    hours are skipped, as in the calculator form. ``final_gpa`` is None when
+    no course counts.
+    """
+    total_grade_points = 0.0
+    total_credit_hours = 0.0
+    results = []
+    for i, course in enumerate(_items(courses, 'courses', MAX_COURSES)):
+        total_marks = _number(course, 'total_marks', 100.0)
+        obtained_marks = _number(course, 'obtained_marks', 0.0)
+        credit_hours = _number(course, 'credit_hours', 3.0)
+        if obtained_marks > total_marks:
+            raise ValueError(f"Course {i + 1}: obtained marks exceed total marks")
+        if total_marks > 0 and credit_hours > 0:
+            percentage = (obtained_marks / total_marks) * 100
+            grade, gpa = get_grade_info(percentage)
+            grade_points = gpa * credit_hours
+            total_grade_points += grade_points
+            total_credit_hours += credit_hours
+            results.append({
+                'course_name': str(course.get('course_name') or f"Course {i + 1}"),
+                'total_marks': total_marks,
+                'obtained_marks': obtained_marks,
+                'credit_hours': credit_hours,
+                'percentage': float(percentage),
+                'grade': grade,
+                'gpa': float(gpa),
+                'grade_points': float(grade_points)
+            })
+    return {
+        'courses': results,
+        'final_gpa': total_grade_points / total_credit_hours if total_credit_hours > 0 else None,
+        'total_credit_hours': total_credit_hours,
+        'total_grade_points': total_grade_points
+    }
+
+
+def calculate_cgpa(semesters):
+    """Overall CGPA for a list of semester dicts with ``gpa`` and ``credit_hours``.
+
+    Semesters without credit hours are skipped; ``final_cgpa`` is None when
+    none counts.
+    """
+    total_grade_points = 0.0
+    total_credit_hours = 0.0
+    results = []
+    for i, semester in enumerate(_items(semesters, 'semesters', MAX_SEMESTERS)):
+        semester_gpa = _number(semester, 'gpa', 0.0)
+        credit_hours = _number(semester, 'credit_hours', 0.0)
+        if credit_hours > 0:
+            grade_points = semester_gpa * credit_hours
+            total_grade_points += grade_points
+            total_credit_hours += credit_hours
+            results.append({
+                'semester_number': i + 1,
+                'semester_gpa': semester_gpa,
+                'credit_hours': credit_hours,
+                'grade_points': float(grade_points)
+            })
+    return {
+        'semesters': results,
+        'final_cgpa': total_grade_points / total_credit_hours if total_credit_hours > 0 else None,
+        'total_credit_hours': total_credit_hours,
+        'total_grade_points': total_grade_points
+    }
+
+
+def build_record(result, user_name, roll_number=None, timestamp=None):
+    """The stored record for a calculation result"""
+    record = {
+        'user_name': user_name,
+        'timestamp': timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    record.update(result)
+    if roll_number and str(roll_number).strip():
+        record['roll_number'] = str(roll_number).strip()
+    return record
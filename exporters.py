@@ -0,0 +1,239 @@
+"""Report exports for the admin records pages.
+
+The "Download All" CSVs are generated as a stream of text chunks in long
+format (one row per course or semester) and written once per data version
+to an export file that later reruns reuse.
+
+Excel reports use openpyxl's write-only mode, which streams rows to disk
+instead of holding the workbook in memory, and are cached the same way.
+"""
+import csv
+import glob
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+from openpyxl import Workbook
+
+from storage import cached
+
+CSV_CHUNK_ROWS = 5000
+MAX_STUDENT_SHEETS = 1000
+MAX_CACHED_REPORTS = 32
+
+RECORD_FIELDS = {
+    'GPA': ('user_name', 'timestamp', 'final_gpa', 'total_credit_hours', 'total_grade_points'),
+    'CGPA': ('user_name', 'timestamp', 'final_cgpa', 'total_credit_hours', 'total_grade_points'),
+}
+SUMMARY_LABELS = {
+    'GPA': ('Final GPA', 'final_gpa'),
+    'CGPA': ('Final CGPA', 'final_cgpa'),
+}
+DETAIL_FIELDS = {
+    'GPA': ('courses', 'course_no', ('course_name', 'total_marks', 'obtained_marks', 'credit_hours',
+                                     'percentage', 'grade', 'gpa', 'grade_points')),
+    'CGPA': ('semesters', 'semester_no', ('semester_number', 'semester_gpa', 'credit_hours',
+                                          'grade_points')),
+}
+
+
+# Long-format header: record columns, then detail columns prefixed by kind
+def csv_header(kind):
+    key, number_field, fields = DETAIL_FIELDS[kind]
+    prefix = key[:-1] + '_'
+    return list(RECORD_FIELDS[kind]) + [number_field] + [
+        f if f.startswith(prefix) else prefix + f for f in fields]
+
+
+def iter_long_rows(records, kind):
+    """Yield one row per course/semester (or one bare row if a record has none)"""
+    key, _, fields = DETAIL_FIELDS[kind]
+    record_fields = RECORD_FIELDS[kind]
+    for record in records:
+        base = [record.get(f, '') for f in record_fields]
+        details = record.get(key) or []
+        if not details:
+            yield base + [''] * (len(fields) + 1)
+        for number, detail in enumerate(details, start=1):
+            yield base + [number] + [detail.get(f, '') for f in fields]
+
+
+def iter_csv_chunks(records, kind, chunk_rows=CSV_CHUNK_ROWS):
+    """Yield the CSV text in chunks of ``chunk_rows`` rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(csv_header(kind))
+    pending = 0
+    for row in iter_long_rows(records, kind):
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def _version_tag(version):
+    return hashlib.md5(repr(version).encode()).hexdigest()[:12]
+
+
+def cached_csv_export(store, kind, export_dir):
+    """Path of the long-format CSV for the store's current data version.
+
+    The file is only regenerated when the records change; exports for older
+    versions are removed.
+    """
+    version = store.version()
+
+    def build():
+        os.makedirs(export_dir, exist_ok=True)
+        prefix = os.path.join(export_dir, f"{kind.lower()}_records_")
+        path = f"{prefix}{_version_tag(version)}.csv"
+        if not os.path.exists(path):
+            fd, tmp_path = tempfile.mkstemp(dir=export_dir, suffix='.partial')
+            with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+                for chunk in iter_csv_chunks(store.iter_records(), kind):
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+        for old in glob.glob(glob.escape(prefix) + '*.csv'):
+            if old != path:
+                os.unlink(old)
+        return path
+
+    path = cached(('csv_export', store.path, kind), version, build)
+    return path if os.path.exists(path) else build()
+
+
+def _sheet_title(name, used):
+    # Excel sheet names: max 31 chars, no []:*?/\ and unique ignoring case
+    base = re.sub(r"[\[\]:*?/\\]", "_", str(name))[:31].strip("' ") or "Student"
+    title, n = base, 2
+    while title.lower() in used:
+        suffix = f" ({n})"
+        title = base[:31 - len(suffix)] + suffix
+        n += 1
+    used.add(title.lower())
+    return title
+
+
+def _write_student_sheets(workbook, record, kind, student_name):
+    label, value_field = SUMMARY_LABELS[kind]
+    summary = workbook.create_sheet("Summary")
+    summary.append(['Metric', 'Value'])
+    summary.append(['Student Name', student_name])
+    summary.append(['Total Credit Hours', record.get('total_credit_hours', 0)])
+    summary.append(['Total Grade Points', record.get('total_grade_points', 0)])
+    summary.append([label, record.get(value_field, 0)])
+    summary.append(['Date', record.get('timestamp', '')])
+
+    key, number_field, fields = DETAIL_FIELDS[kind]
+    details = workbook.create_sheet(key.capitalize())
+    details.append([number_field] + list(fields))
+    for number, detail in enumerate(record.get(key) or [], start=1):
+        details.append([number] + [detail.get(f, '') for f in fields])
+
+
+def _save_workbook(workbook):
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def student_report_xlsx(record, kind, student_name):
+    """Two-sheet workbook (summary + courses/semesters) for one record, as bytes"""
+    workbook = Workbook(write_only=True)
+    _write_student_sheets(workbook, record, kind, student_name)
+    return _save_workbook(workbook)
+
+
+# Recently built single-student reports, least recently used first. Kept out
+# of the shared data cache, whose entries are only freed by invalidation.
+_reports = OrderedDict()
+_reports_lock = threading.Lock()
+
+
+def cached_student_report_xlsx(store, record, kind, student_name, max_reports=MAX_CACHED_REPORTS):
+    key = (store.path, store.version(), kind, student_name, record.get('timestamp', ''))
+    with _reports_lock:
+        report = _reports.get(key)
+        if report is not None:
+            _reports.move_to_end(key)
+            return report
+    report = student_report_xlsx(record, kind, student_name)
+    with _reports_lock:
+        _reports[key] = report
+        while len(_reports) > max_reports:
+            _reports.popitem(last=False)
+    return report
+
+
+def write_cohort_xlsx(records, kind, path, max_student_sheets=MAX_STUDENT_SHEETS):
+    """Cohort workbook streamed to ``path``.
+
+    An index sheet lists every student. Up to ``max_student_sheets`` students
+    each get their own sheet; larger cohorts get one long-format detail
+    sheet instead, since openpyxl checks every new sheet title against all
+    existing ones (quadratic in the number of sheets).
+    """
+    by_student = {}
+    for record in records:
+        by_student.setdefault(record.get('user_name', ''), []).append(record)
+
+    label, value_field = SUMMARY_LABELS[kind]
+    key, number_field, fields = DETAIL_FIELDS[kind]
+    per_student = len(by_student) <= max_student_sheets
+    workbook = Workbook(write_only=True)
+    index = workbook.create_sheet("Students")
+    index.append(['Student Name', 'Records', 'Latest Date', f"Latest {label}", 'Sheet'])
+    used = {"students"}
+    titles = {}
+    for student_name, student_records in by_student.items():
+        latest = max(student_records, key=lambda r: r.get('timestamp', ''))
+        titles[student_name] = _sheet_title(student_name, used) if per_student else key.capitalize()
+        index.append([student_name, len(student_records), latest.get('timestamp', ''),
+                      latest.get(value_field, 0), titles[student_name]])
+
+    if not per_student:
+        sheet = workbook.create_sheet(key.capitalize())
+        sheet.append(['user_name', 'timestamp', label, number_field] + list(fields))
+    for student_name, student_records in by_student.items():
+        if per_student:
+            sheet = workbook.create_sheet(titles[student_name])
+            sheet.append(['timestamp', label, number_field] + list(fields))
+        lead = [] if per_student else [student_name]
+        for record in student_records:
+            for number, detail in enumerate(record.get(key) or [], start=1):
+                sheet.append(lead + [record.get('timestamp', ''), record.get(value_field, 0), number] +
+                             [detail.get(f, '') for f in fields])
+        if per_student:
+            # Finish the sheet now so only one temp file is open at a time
+            sheet.close()
+    workbook.save(path)
+
+
+def cached_cohort_xlsx_export(store, kind, export_dir):
+    """Path of the per-student workbook for the store's current data version"""
+    version = store.version()
+
+    def build():
+        os.makedirs(export_dir, exist_ok=True)
+        prefix = os.path.join(export_dir, f"{kind.lower()}_workbook_")
+        path = f"{prefix}{_version_tag(version)}.xlsx"
+        if not os.path.exists(path):
+            fd, tmp_path = tempfile.mkstemp(dir=export_dir, suffix='.partial')
+            os.close(fd)
+            write_cohort_xlsx(store.load(), kind, tmp_path)
+            os.replace(tmp_path, path)
+        for old in glob.glob(glob.escape(prefix) + '*.xlsx'):
+            if old != path:
+                os.unlink(old)
+        return path
+
+    path = cached(('xlsx_export', store.path, kind), version, build)
+    return path if os.path.exists(path) else build()
@@ -0,0 +1,121 @@
+"""Grading engine for the SMIU GPA & CGPA calculator.
+
+Grades are looked up by lower-bound breakpoints built once from GRADE_TABLE,
+so fractional percentages fall into the band below the next breakpoint
+(90.5% is an A-, not an unmatched 'F'). The batch functions grade whole
+cohorts at once with NumPy ``searchsorted`` and pandas ``groupby``.
+
+Percentages are rounded to PERCENTAGE_DECIMALS before the lookup so float
+noise such as 58 / 100 * 100 == 57.99999999999999 does not drop a band.
+"""
+from bisect import bisect_right
+from functools import lru_cache
+
+# Grading table
+GRADE_TABLE = [
+    (91, 100, 'A', 4.00),
+    (80, 90, 'A-', 3.66),
+    (75, 79, 'B+', 3.33),
+    (71, 74, 'B', 3.00),
+    (68, 70, 'B-', 2.66),
+    (64, 67, 'C+', 2.33),
+    (61, 63, 'C', 2.00),
+    (58, 60, 'C-', 1.66),
+    (54, 57, 'D+', 1.33),
+    (50, 53, 'D', 1.00),
+    (0, 49, 'F', 0.00)
+]
+
+# Ascending lower bounds with their grades, precomputed from GRADE_TABLE
+_BANDS = sorted(GRADE_TABLE)
+GRADE_BREAKPOINTS = [band[0] for band in _BANDS]
+GRADE_LETTERS = [band[2] for band in _BANDS]
+GRADE_POINTS = [band[3] for band in _BANDS]
+
+PERCENTAGE_DECIMALS = 6
+
+
+# NumPy lookup arrays, built on the first batch call so the per-course
+# lookup does not import NumPy
+@lru_cache(maxsize=None)
+def _band_arrays():
+    import numpy as np
+    return (np.array(GRADE_BREAKPOINTS, dtype=float), np.array(GRADE_LETTERS, dtype=object),
+            np.array(GRADE_POINTS, dtype=float))
+
+
+def get_grade_info(percentage):
+    index = bisect_right(GRADE_BREAKPOINTS, round(percentage, PERCENTAGE_DECIMALS)) - 1
+    if index < 0:
+        return 'F', 0.00
+    return GRADE_LETTERS[index], GRADE_POINTS[index]
+
+
+# Vectorized grading of many course rows
+def grade_marks(obtained, total, credit_hours):
+    """Grade arrays of (obtained, total, credit_hours).
+
+    Returns a dict of NumPy arrays: percentage, grade, gpa, grade_points and
+    ``counted`` (rows with positive total marks and credit hours, the same
+    rows the calculator form counts towards the GPA).
+    """
+    import numpy as np
+    breakpoints, letters, points = _band_arrays()
+    obtained = np.asarray(obtained, dtype=float)
+    total = np.asarray(total, dtype=float)
+    credit_hours = np.asarray(credit_hours, dtype=float)
+
+    counted = (total > 0) & (credit_hours > 0)
+    percentage = np.divide(obtained * 100.0, total, out=np.zeros_like(obtained), where=total > 0)
+    index = np.searchsorted(breakpoints, np.round(percentage, PERCENTAGE_DECIMALS),
+                            side='right') - 1
+    index = np.clip(index, 0, None)
+    gpa = points[index]
+    return {
+        'percentage': percentage,
+        'grade': letters[index],
+        'gpa': gpa,
+        'grade_points': np.where(counted, gpa * credit_hours, 0.0),
+        'counted': counted,
+    }
+
+
+def grade_frame(df, obtained='obtained_marks', total='total_marks', credit_hours='credit_hours'):
+    """Return a copy of ``df`` with percentage/grade/gpa/grade_points columns"""
+    graded = grade_marks(df[obtained].to_numpy(), df[total].to_numpy(), df[credit_hours].to_numpy())
+    out = df.copy()
+    for column in ('percentage', 'grade', 'gpa', 'grade_points', 'counted'):
+        out[column] = graded[column]
+    return out
+
+
+def cohort_gpa(df, by='user_name', obtained='obtained_marks', total='total_marks',
+               credit_hours='credit_hours'):
+    """Per-student GPA for a long-format frame of course rows.
+
+    Returns one row per ``by`` value with courses, total_credit_hours,
+    total_grade_points and final_gpa.
+    """
+    import pandas as pd
+    graded = grade_marks(df[obtained].to_numpy(), df[total].to_numpy(), df[credit_hours].to_numpy())
+    counted = graded['counted']
+    frame = pd.DataFrame({
+        by: df[by].to_numpy()[counted],
+        'courses': 1,
+        'total_credit_hours': df[credit_hours].to_numpy(dtype=float)[counted],
+        'total_grade_points': graded['grade_points'][counted],
+    })
+    result = frame.groupby(by, sort=False).sum()
+    result['final_gpa'] = result['total_grade_points'] / result['total_credit_hours']
+    return result.reset_index()
+
+
+# The grading-scale table shown to students; built once, never modified
+@lru_cache(maxsize=None)
+def grading_scale_frame():
+    import pandas as pd
+    return pd.DataFrame({
+        'Percentage Range': [f"{low}% - {high}%" for low, high, _, _ in GRADE_TABLE],
+        'Letter Grade': [grade for _, _, grade, _ in GRADE_TABLE],
+        'Grade Point': [gpa for _, _, _, gpa in GRADE_TABLE],
+    })
@@ -0,0 +1,242 @@
+"""Student name index for the admin records search.
+
+Names are normalized (case-folded, accents stripped, ``.``, ``-`` and ``_``
+read as spaces, whitespace collapsed) and split into words. The index
+keeps:
+
+- a posting list per distinct name: the positions of that student's records
+- the set of names containing each word
+- the sorted word vocabulary, for prefix lookups with ``bisect``
+- a trigram -> words map over the vocabulary, for substring and fuzzy lookups
+- a posting list per student key (roll number, or the name without
+  punctuation), so one student's history is found without a scan
+
+Queries work on the vocabulary (far smaller than the record count) and only
+touch the names that match, so they do not scan the records. The index is
+append-only; stores add new records to it instead of rebuilding it.
+"""
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+SEARCH_MODES = ('contains', 'prefix', 'fuzzy')
+FUZZY_THRESHOLD = 0.5
+NAME_PAGE_SIZE = 50
+MEMO_QUERIES = 32
+
+
+# "M.Moiz", "m-moiz" and "m_moiz" are two words, like "m moiz"
+WORD_SEPARATORS = re.compile(r"[._-]")
+
+
+def normalize_name(name):
+    decomposed = unicodedata.normalize('NFKD', str(name))
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(WORD_SEPARATORS.sub(' ', stripped.casefold()).split())
+
+
+def student_key(user_name, roll_number=None):
+    """Identity of a student: the roll number when given, else the normalized name"""
+    roll = ''.join(str(roll_number or '').split()).casefold()
+    if roll:
+        return f"roll:{roll}"
+    return "name:" + normalize_name(re.sub(r"[^\w\s]", " ", str(user_name or '')))
+
+
+def _trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# Dice coefficient of two trigram sets
+def _similarity(a, b):
+    return 2 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+
+
+class NameIndex:
+    """Incremental normalized name index (see module docstring)"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.size = 0          # records indexed so far
+        self.version = None    # store version the index was last synced to
+        self.names = []        # name id -> original user_name
+        self.normalized = []   # name id -> normalized user_name
+        self.postings = []     # name id -> record positions
+        self._name_ids = {}    # original user_name -> name id
+        self._word_names = {}  # word -> set of name ids
+        self._vocabulary = []  # sorted words
+        self._word_grams = {}  # trigram -> set of words
+        self._memo = {}        # (term, mode) -> matched name ids, for paging
+        self.student_postings = {}  # student key -> record positions
+        self.student_names = {}     # student key -> latest user_name
+        self.name_students = []     # name id -> student keys recorded under it
+
+    def add(self, user_name, position, roll_number=None):
+        user_name = user_name or ''
+        key = student_key(user_name, roll_number)
+        self.student_postings.setdefault(key, []).append(position)
+        self.student_names[key] = user_name
+        name_id = self._name_ids.get(user_name)
+        if name_id is None:
+            name_id = self._name_ids[user_name] = len(self.names)
+            normalized = normalize_name(user_name)
+            self.names.append(user_name)
+            self.normalized.append(normalized)
+            self.postings.append([])
+            self.name_students.append(set())
+            for word in set(normalized.split()):
+                if word not in self._word_names:
+                    self._word_names[word] = set()
+                    insort(self._vocabulary, word)
+                    for gram in _trigrams(word):
+                        self._word_grams.setdefault(gram, set()).add(word)
+                self._word_names[word].add(name_id)
+        self.postings[name_id].append(position)
+        self.name_students[name_id].add(key)
+        self.size += 1
+
+    def add_names(self, rows):
+        """Index (user_name, position, roll_number) rows"""
+        with self.lock:
+            self._memo.clear()
+            for user_name, position, roll_number in rows:
+                self.add(user_name, position, roll_number)
+
+    def add_records(self, records, start):
+        self.add_names((r.get('user_name', ''), p, r.get('roll_number'))
+                       for p, r in enumerate(records, start=start))
+
+    # Words matching one query token
+    def _prefix_words(self, token):
+        start = bisect_left(self._vocabulary, token)
+        end = bisect_left(self._vocabulary, token + '\U0010ffff')
+        return self._vocabulary[start:end]
+
+    def _substring_words(self, token):
+        if len(token) < 3:
+            return [w for w in self._vocabulary if token in w]
+        grams = sorted((self._word_grams.get(g, ()) for g in _trigrams(token)
+                        if ' ' not in g), key=len)
+        candidates = set(grams[0]).intersection(*grams[1:]) if grams else set()
+        return [w for w in candidates if token in w]
+
+    def _suffix_words(self, token):
+        return [w for w in self._substring_words(token) if w.endswith(token)]
+
+    def _whole_words(self, token):
+        return [token] if token in self._word_names else []
+
+    def _fuzzy_words(self, token):
+        """(word, score) for vocabulary words similar to ``token``.
+
+        Candidates must share one of the token's rarest trigrams; a word
+        sharing none of them cannot reach FUZZY_THRESHOLD.
+        """
+        grams = _trigrams(token)
+        ranked = sorted(grams, key=lambda g: len(self._word_grams.get(g, ())))
+        min_overlap = -(-FUZZY_THRESHOLD * len(grams) // (2 - FUZZY_THRESHOLD))
+        candidates = set()
+        for gram in ranked[:len(grams) - int(min_overlap) + 1]:
+            candidates.update(self._word_grams.get(gram, ()))
+        matches = {w: 1.0 for w in self._prefix_words(token)}
+        for word in candidates:
+            score = _similarity(grams, _trigrams(word))
+            if score >= FUZZY_THRESHOLD and score > matches.get(word, 0.0):
+                matches[word] = score
+        return matches
+
+    def _names_with(self, words):
+        names = set()
+        for word in words:
+            names |= self._word_names[word]
+        return names
+
+    def match(self, term, mode='contains'):
+        """Name ids matching ``term``, best first (alphabetical for ties)"""
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        term = normalize_name(term)
+        tokens = term.split()
+        with self.lock:
+            if not tokens:
+                return sorted(range(len(self.names)), key=lambda n: self.normalized[n])
+            if mode == 'fuzzy':
+                scores = None
+                for token in tokens:
+                    token_scores = {}
+                    for word, score in self._fuzzy_words(token).items():
+                        for name_id in self._word_names[word]:
+                            if score > token_scores.get(name_id, 0.0):
+                                token_scores[name_id] = score
+                    if scores is None:
+                        scores = token_scores
+                    else:
+                        scores = {n: s + token_scores[n] for n, s in scores.items() if n in token_scores}
+                return sorted(scores, key=lambda n: (-scores[n], self.normalized[n]))
+
+            if mode == 'prefix':
+                lookups = [self._prefix_words] * len(tokens)
+            elif len(tokens) == 1:
+                lookups = [self._substring_words]
+            else:
+                # In a phrase the first token ends a word, the last one starts a
+                # word and the ones in between are whole words
+                lookups = ([self._suffix_words] + [self._whole_words] * (len(tokens) - 2) +
+                           [self._prefix_words])
+            matched = None
+            for token, lookup in sorted(zip(tokens, lookups), key=lambda t: len(t[0]), reverse=True):
+                names = self._names_with(lookup(token))
+                matched = names if matched is None else matched & names
+                if not matched:
+                    return []
+            if mode == 'contains' and len(tokens) > 1:
+                # Tokens can match different words; check the phrase itself
+                matched = [n for n in matched if term in self.normalized[n]]
+            return sorted(matched, key=lambda n: self.normalized[n])
+
+    # match() memoized per (term, mode) until the next add; call with the lock held
+    def _memo_match(self, term, mode):
+        key = (term, mode)
+        matched = self._memo.get(key)
+        if matched is None:
+            if len(self._memo) >= MEMO_QUERIES:
+                self._memo.clear()
+            matched = self._memo[key] = self.match(term, mode)
+        return matched
+
+    def search(self, term, mode='contains', offset=0, limit=NAME_PAGE_SIZE):
+        """One page of matching user names and the total number of matches"""
+        with self.lock:
+            matched = self._memo_match(term, mode)
+            return [self.names[n] for n in matched[offset:offset + limit]], len(matched)
+
+    def search_students(self, term, mode='contains', limit=NAME_PAGE_SIZE):
+        """Keys of the students under the first ``limit`` matching names, and
+        the total number of matching names"""
+        with self.lock:
+            matched = self._memo_match(term, mode)
+            keys = []
+            for name_id in matched[:limit]:
+                keys.extend(sorted(self.name_students[name_id]))
+            return keys, len(matched)
+
+    def name_ids(self, user_names):
+        with self.lock:
+            return [self._name_ids[n] for n in user_names if n in self._name_ids]
+
+    def positions(self, name_ids):
+        """Sorted record positions of the given names"""
+        with self.lock:
+            return sorted(p for n in name_ids for p in self.postings[n])
+
+    def student_positions(self, keys):
+        """Sorted record positions of the given student keys"""
+        with self.lock:
+            return sorted(p for k in keys for p in self.student_postings.get(k, ()))
+
+    def students(self):
+        """(student key, latest user_name, record count) for every student"""
+        with self.lock:
+            return [(k, self.student_names[k], len(p)) for k, p in self.student_postings.items()]
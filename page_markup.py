@@ -0,0 +1,169 @@
+"""Static page markup for the Streamlit app.
+
+The stylesheet and the fixed header, footer and notice blocks are built
+once when this module is first imported, instead of on every script rerun.
+"""
+
+# Custom CSS
+APP_CSS = """
+    <style>
+    .main-header {
+        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
+        padding: 2rem;
+        border-radius: 10px;
+        color: white;
+        text-align: center;
+        margin-bottom: 2rem;
+    }
+    .metric-card {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        padding: 1.5rem;
+        border-radius: 10px;
+        color: white;
+        text-align: center;
+    }
+    .result-card {
+        background: #f0f9ff;
+        padding: 1.5rem;
+        border-radius: 10px;
+        border-left: 4px solid #667eea;
+        margin: 1rem 0;
+    }
+    .stButton>button {
+        background-color: #667eea;
+        color: white;
+        font-weight: bold;
+        border: none;
+        border-radius: 5px;
+        padding: 0.5rem 1rem;
+        margin: 0.25rem 0;
+    }
+    .stButton>button:hover {
+        background-color: #5a67d8;
+    }
+    .admin-panel {
+        background: #f8f9fa;
+        padding: 2rem;
+        border-radius: 10px;
+        border: 1px solid #dee2e6;
+    }
+    .login-container {
+        max-width: 400px;
+        margin: 0 auto;
+        padding: 2rem;
+        background: white;
+        border-radius: 10px;
+        box-shadow: 0 0 20px rgba(0,0,0,0.1);
+    }
+    .url-card {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        padding: 1.5rem;
+        border-radius: 10px;
+        color: white;
+        text-align: center;
+        margin: 1rem 0;
+    }
+    .short-url-container {
+        background: #f0f9ff;
+        padding: 1.5rem;
+        border-radius: 10px;
+        border-left: 4px solid #667eea;
+        margin: 1rem 0;
+    }
+    .danger-button {
+        background-color: #dc3545 !important;
+        color: white !important;
+    }
+    .danger-button:hover {
+        background-color: #c82333 !important;
+    }
+    .warning-button {
+        background-color: #ffc107 !important;
+        color: #212529 !important;
+    }
+    .warning-button:hover {
+        background-color: #e0a800 !important;
+    }
+    .deactivated-message {
+        background-color: #fff3cd;
+        border: 1px solid #ffeaa7;
+        border-radius: 10px;
+        padding: 2rem;
+        text-align: center;
+        margin: 2rem auto;
+        max-width: 600px;
+    }
+    .deactivated-title {
+        color: #856404;
+        font-size: 1.5rem;
+        margin-bottom: 1rem;
+    }
+    .deactivated-text {
+        color: #856404;
+        font-size: 1.1rem;
+    }
+    .back-button {
+        background-color: #6c757d !important;
+        color: white !important;
+        margin-top: 1rem;
+    }
+    .delete-confirmation {
+        background-color: #fff3cd;
+        border: 1px solid #ffeaa7;
+        border-radius: 10px;
+        padding: 2rem;
+        margin: 1rem 0;
+    }
+    .calculator-container {
+        max-width: 1200px;
+        margin: 0 auto;
+    }
+    .export-option {
+        background: #f8f9fa;
+        padding: 1rem;
+        border-radius: 10px;
+        border-left: 4px solid #28a745;
+        margin: 0.5rem 0;
+    }
+    </style>
+"""
+
+HEADER_HTML = """
+        <div class="main-header" style="text-align: center;">
+         <img src="https://www.smiu.edu.pk/themes/smiu/images/13254460_710745915734761_8157428650049174152_n.png" width="200">
+            <h1>SMIU GPA & CGPA Calculator</h1>
+            <p>Calculate your GPA and CGPA</p>
+        </div>
+    """
+
+FOOTER_HTML = """
+        <div style='text-align: center; color: #666;'>
+            <p>Made By Muhammad Moiz | SMIU GPA & CGPA Management System</p>
+        </div>
+    """
+
+DEACTIVATED_HTML = """
+        <div class="deactivated-message">
+            <h2 class="deactivated-title">🚫 URL Deactivated</h2>
+            <p class="deactivated-text">
+                <strong>This URL has been deactivated by your class CR.</strong><br><br>
+                Please contact your class representative for a new access URL.
+            </p>
+            <p style="color: #666; margin-top: 1rem;">
+                If you are the admin, please login through the admin panel.
+            </p>
+        </div>
+    """
+
+EXPIRED_HTML = """
+        <div class="deactivated-message">
+            <h2 class="deactivated-title">⌛ URL Expired</h2>
+            <p class="deactivated-text">
+                <strong>This URL has expired or reached its usage limit.</strong><br><br>
+                Please contact your class representative for a new access URL.
+            </p>
+            <p style="color: #666; margin-top: 1rem;">
+                If you are the admin, please login through the admin panel.
+            </p>
+        </div>
+    """
@@ -0,0 +1,265 @@
+"""Short URL state for the student access links.
+
+The full URL shortener file (codes, history, settings) is only needed by the
+admin panel. Student page loads just need "is this code active?", so a
+compact code -> status index is kept in its own small file and served from
+the process-wide cache.
+
+``short_codes`` (code -> details) is the only registry: whether a code is
+active is its ``status`` field. Changes go through the helpers below, which
+cost O(1) per code touched, and a batch of them is one ``url_transaction``.
+
+A code may carry an ``expires_at`` timestamp and a ``max_uses`` count. The
+hot index only holds live codes (code -> their limits); deactivated and
+expired codes sit in a retired index that is read only when a code misses
+the hot one. Limits are checked lazily at lookup, and ``sweep_expired``
+moves codes past their limits out of the hot index in batches. A code past its expiry becomes 'expired', one that
+has used up its uses 'used_up'; the sessions that took those uses keep
+working.
+"""
+import os
+import secrets
+import string
+from collections import Counter
+from contextlib import contextmanager
+
+from storage import atomic_write_json, cached, cached_json, file_lock, file_signature, read_json
+
+CODE_ALPHABET = string.ascii_letters + string.digits
+RETIRED_SUFFIX = ".retired.json"
+USES_SUFFIX = ".uses.json"
+LIMIT_FIELDS = ("expires_at", "max_uses")
+SWEEP_BATCH_SIZE = 500
+
+
+def retired_index_path(index_file):
+    return os.path.splitext(index_file)[0] + RETIRED_SUFFIX
+
+
+def uses_path(index_file):
+    return os.path.splitext(index_file)[0] + USES_SUFFIX
+
+
+def build_code_index(url_data):
+    """Split the registry into the hot index and the retired index.
+
+    Hot: active code -> its limits ({} when it has none). Retired:
+    code -> status for everything else.
+    """
+    live, retired = {}, {}
+    for code, details in url_data.get("short_codes", {}).items():
+        status = details.get("status", "active")
+        if status == "active":
+            live[code] = {field: details[field] for field in LIMIT_FIELDS
+                          if details.get(field) is not None}
+        else:
+            retired[code] = status
+    return live, retired
+
+
+def write_code_index(index_file, url_data):
+    live, retired = build_code_index(url_data)
+    atomic_write_json(index_file, live, indent=None)
+    atomic_write_json(retired_index_path(index_file), retired, indent=None)
+
+
+@contextmanager
+def url_transaction(url_file, index_file):
+    """Locked read-modify-write of the URL shortener file.
+
+    The code index is rewritten from the result under the same lock, so it
+    never disagrees with the short codes it was derived from. Both files are
+    written without indentation; with many codes that halves the write.
+    """
+    with file_lock(url_file):
+        url_data = read_json(url_file, {})
+        yield url_data
+        atomic_write_json(url_file, url_data, indent=None)
+        write_code_index(index_file, url_data)
+
+
+# Random short code (may collide; use mint_codes for codes to store).
+# One draw for the whole code, spelled out in base 62.
+def generate_short_code(length=8):
+    value = secrets.randbelow(len(CODE_ALPHABET) ** length)
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, len(CODE_ALPHABET))
+        chars.append(CODE_ALPHABET[digit])
+    return ''.join(chars)
+
+
+def mint_codes(taken, n, length=8):
+    """``n`` new random codes, distinct from each other and from ``taken``.
+
+    ``taken`` is anything supporting ``in`` (the ``short_codes`` dict), so
+    each candidate costs one hash lookup. Refuses to fill more than half of
+    the free code space, where retries would start to pile up.
+    """
+    free = len(CODE_ALPHABET) ** length - len(taken)
+    if n > free // 2:
+        raise ValueError(f"Cannot mint {n} codes of length {length}; use longer codes")
+    minted = {}
+    while len(minted) < n:
+        code = generate_short_code(length)
+        if code not in taken:
+            minted[code] = None
+    return list(minted)
+
+
+# Add active codes to the registry; returns {code: details} of the new entries
+def add_codes(url_data, codes, created_by, base_url, created_at, **extra):
+    short_codes = url_data.setdefault("short_codes", {})
+    seen = set()
+    for code in codes:  # check everything first so a clash changes nothing
+        if code in short_codes or code in seen:
+            raise ValueError(f"Short code '{code}' already exists")
+        seen.add(code)
+    base_url = base_url.rstrip('/')
+    added = {}
+    for code in codes:
+        added[code] = short_codes[code] = {
+            "created_at": created_at,
+            "created_by": created_by,
+            "full_url": f"{base_url}/?student={code}",
+            "status": "active",
+            "base_url_used": base_url,
+            **extra,
+        }
+    return added
+
+
+# Set the status of codes; returns the codes that changed
+def set_code_status(url_data, codes, status):
+    short_codes = url_data.get("short_codes", {})
+    changed = []
+    for code in codes:
+        details = short_codes.get(code)
+        if details is not None and details.get("status", "active") != status:
+            details["status"] = status
+            changed.append(code)
+    return changed
+
+
+# Remove codes; returns {code: details} of the ones that existed
+def delete_codes(url_data, codes):
+    short_codes = url_data.get("short_codes", {})
+    return {code: short_codes.pop(code) for code in codes if code in short_codes}
+
+
+# Create the indexes for data written before they existed (or before the
+# retired index split off), and drop the "active_short_codes" list that
+# used to duplicate the status fields
+def ensure_code_index(url_file, index_file):
+    with file_lock(url_file):
+        url_data = read_json(url_file, {})
+        if "active_short_codes" in url_data:
+            del url_data["active_short_codes"]
+            atomic_write_json(url_file, url_data, indent=None)
+        elif os.path.exists(index_file) and os.path.exists(retired_index_path(index_file)):
+            return
+        write_code_index(index_file, url_data)
+
+
+# 'expired' once a live code is past its expiry time, 'used_up' once it has
+# used up its uses, otherwise None
+def limit_status(limits, uses, now):
+    expires_at = limits.get("expires_at")
+    max_uses = limits.get("max_uses")
+    if expires_at is not None and expires_at <= now:
+        return "expired"
+    if max_uses is not None and uses >= max_uses:
+        return "used_up"
+    return None
+
+
+def code_uses(index_file, code):
+    return cached_json(uses_path(index_file), {}).get(code, 0)
+
+
+def lookup_code_status(index_file, code, now):
+    """Status of a short code ('active', 'expired', 'used_up', ...) or None
+    if unknown.
+
+    ``now`` is a "%Y-%m-%d %H:%M:%S" timestamp. A live code past its limits
+    reads as 'expired' or 'used_up' before the sweeper has retired it.
+    """
+    limits = cached_json(index_file, {}).get(code)
+    if limits is None:
+        return cached_json(retired_index_path(index_file), {}).get(code)
+    if limits:
+        return limit_status(limits, code_uses(index_file, code), now) or "active"
+    return "active"
+
+
+def claim_code_use(index_file, code):
+    """Take one use of a code; False if its uses are already used up.
+
+    The check and the count happen under one lock, so two sessions can never
+    both take a code's last use. Codes without a max_uses are not counted.
+    """
+    max_uses = cached_json(index_file, {}).get(code, {}).get("max_uses")
+    if max_uses is None:
+        return True
+    path = uses_path(index_file)
+    with file_lock(path):
+        uses = read_json(path, {})
+        if uses.get(code, 0) >= max_uses:
+            return False
+        uses[code] = uses.get(code, 0) + 1
+        atomic_write_json(path, uses, indent=None)
+    return True
+
+
+def sweep_expired(url_file, index_file, now, batch_size=SWEEP_BATCH_SIZE):
+    """Retire live codes past their limits, ``batch_size`` per transaction.
+
+    Candidates come from the hot index, so a sweep costs O(live codes)
+    rather than O(all codes). Returns {code: details} of the expired codes.
+    """
+    expired = {}
+    while True:
+        uses = cached_json(uses_path(index_file), {})
+        due, n_due = {}, 0
+        for code, limits in cached_json(index_file, {}).items():
+            status = limits and limit_status(limits, uses.get(code, 0), now)
+            if status:
+                due.setdefault(status, []).append(code)
+                n_due += 1
+                if n_due == batch_size:
+                    break
+        if due:
+            with url_transaction(url_file, index_file) as url_data:
+                short_codes = url_data.get("short_codes", {})
+                for status, codes in due.items():
+                    for code in set_code_status(url_data, codes, status):
+                        short_codes[code]["expired_at"] = now
+                        expired[code] = short_codes[code]
+        if n_due < batch_size:
+            break
+    if expired:
+        prune_code_uses(index_file)
+    return expired
+
+
+# Drop the use counts of codes that are no longer live
+def prune_code_uses(index_file):
+    path = uses_path(index_file)
+    with file_lock(path):
+        uses = read_json(path, {})
+        live = cached_json(index_file, {})
+        kept = {code: n for code, n in uses.items() if code in live}
+        if len(kept) != len(uses):
+            atomic_write_json(path, kept, indent=None)
+
+
+# Number of codes per status, counted once per version of the indexes
+def code_status_counts(index_file):
+    retired_file = retired_index_path(index_file)
+
+    def count():
+        counts = Counter(cached_json(retired_file, {}).values())
+        counts["active"] = len(cached_json(index_file, {}))
+        return counts
+
+    return cached((index_file, "status_counts"), file_signature(index_file, retired_file), count)
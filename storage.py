@@ -0,0 +1,841 @@
+"""Storage backends for the SMIU GPA & CGPA record files.
+
+Student records are kept as a compact JSON array snapshot (the original
+``*.json`` file) plus an append-only JSON-Lines journal next to it
+(``*.jsonl``). Appending a record only writes one line to the journal; the
+journal is folded back into the snapshot once it grows past a size limit.
+
+An optional SQLite backend (``SMIU_STORAGE_BACKEND=sqlite``) keeps the same
+records in a normalized schema with indexes for the admin queries.
+
+Both backends keep running dashboard aggregates (see ``aggregates``) that are
+updated with every append, so ``stats()`` never has to scan the records.
+"""
+import glob
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from bisect import bisect_right
+from contextlib import closing, contextmanager
+
+from aggregates import add_record, build_stats, merge_stats, new_stats
+from name_index import NAME_PAGE_SIZE, NameIndex
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locks only
+    fcntl = None
+
+JOURNAL_SUFFIX = ".jsonl"
+LOCK_SUFFIX = ".lock"
+STATS_SUFFIX = ".stats.json"
+PENDING_MARKER = ".pending-"
+DEFAULT_BACKEND = "journal"
+SQLITE_DB_NAME = "smiu_records.db"
+COMPACT_THRESHOLD_BYTES = 1024 * 1024  # Fold the journal into the snapshot past 1 MB
+COPY_CHUNK_BYTES = 1024 * 1024
+PAGE_SIZE = 25
+ITER_BATCH_SIZE = 1000
+MEMO_ORDERS = 8
+# Sortable record columns and the value used for records without one
+SORT_COLUMNS = {
+    'timestamp': '',
+    'user_name': '',
+    'final_gpa': 0.0,
+    'final_cgpa': 0.0,
+}
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+# Process-wide parsed-file cache: key -> (file signature, value)
+_cache = {}
+_cache_lock = threading.Lock()
+_cache_counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _dumps_compact(obj):
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+
+# A value as it reads back from JSON (tuples become lists)
+def _json_value(obj):
+    return json.loads(json.dumps(obj))
+
+
+# Advisory lock shared by every process/thread touching ``path``
+@contextmanager
+def file_lock(path, shared=False):
+    if fcntl is None:
+        with _thread_locks_guard:
+            lock = _thread_locks.setdefault(os.path.abspath(path), threading.RLock())
+        with lock:
+            yield
+        return
+    with open(path + LOCK_SUFFIX, 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+# (mtime, size, inode) of each path; changes on every write or atomic replace
+def file_signature(*paths):
+    signature = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            signature.append((st.st_mtime_ns, st.st_size, st.st_ino))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def cached(key, signature, loader):
+    """Return the cached value for ``key`` unless ``signature`` changed"""
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == signature:
+            _cache_counters["hits"] += 1
+            return entry[1]
+        _cache_counters["misses"] += 1
+    value = loader()
+    with _cache_lock:
+        _cache[key] = (signature, value)
+    return value
+
+
+def invalidate_cache(path):
+    with _cache_lock:
+        stale = [key for key in _cache if path in (key if isinstance(key, tuple) else (key,))]
+        for key in stale:
+            del _cache[key]
+        _cache_counters["invalidations"] += len(stale)
+
+
+def cache_stats():
+    with _cache_lock:
+        stats = dict(_cache_counters, entries=len(_cache))
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+
+# Write a file via temp file + rename so readers never see a partial file
+def atomic_write_text(path, text):
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+        invalidate_cache(path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path, data, indent=2):
+    atomic_write_text(path, json.dumps(data, indent=indent))
+
+
+# Read a JSON file; only a missing file falls back to ``default``
+def read_json(path, default=None):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+# Cached read_json: parsed once per file version. Treat the result as read-only.
+def cached_json(path, default=None):
+    return cached(path, file_signature(path), lambda: read_json(path, default))
+
+
+@contextmanager
+def transaction(path, default=None):
+    """Locked read-modify-write of a JSON file.
+
+    The yielded object is written back atomically when the block exits
+    normally; an exception inside the block leaves the file untouched.
+    """
+    with file_lock(path):
+        data = read_json(path, default)
+        yield data
+        atomic_write_json(path, data)
+
+
+# Append-only journal backend
+class JournalStore:
+    """Snapshot + JSON-Lines journal record store"""
+
+    name = "journal"
+
+    def __init__(self, path, compact_threshold=COMPACT_THRESHOLD_BYTES):
+        self.path = path
+        self.journal_path = os.path.splitext(path)[0] + JOURNAL_SUFFIX
+        self.stats_path = os.path.splitext(path)[0] + STATS_SUFFIX
+        self._name_index = NameIndex()
+        self._name_index_lock = threading.Lock()
+        self._orders = {}  # (sort, term, mode) -> (version, size, sort keys, positions), ascending
+        self._orders_lock = threading.Lock()
+        self.compact_threshold = compact_threshold
+        # Parsed records and how far into the journal they go: (version,
+        # records, journal bytes consumed). Appends only parse the new tail.
+        self._loaded = None
+        self._loaded_lock = threading.Lock()
+
+    def _load_snapshot(self):
+        data = read_json(self.path, [])
+        if not isinstance(data, list):
+            raise ValueError(f"{self.path} does not contain a JSON array")
+        return data
+
+    def _snapshot_inode(self):
+        try:
+            return os.stat(self.path).st_ino
+        except OSError:
+            return 0
+
+    def iter_journal(self, journal_path=None):
+        """Yield journal records, skipping a torn trailing line"""
+        try:
+            f = open(journal_path or self.journal_path, 'r', encoding='utf-8')
+        except OSError:
+            return
+        with f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    @staticmethod
+    def _only_appended(old, new):
+        # Same snapshot and the same journal file, grown: records were only added
+        return (bool(old) and old[0] == new[0] and old[1] is not None and new[1] is not None
+                and old[1][2] == new[1][2] and new[1][1] >= old[1][1])
+
+    def _pending_journals(self):
+        return glob.glob(glob.escape(self.journal_path) + PENDING_MARKER + '*')
+
+    def _recover_locked(self):
+        # A replace() interrupted between renaming the journal aside and
+        # swapping the snapshot leaves a pending journal tagged with the old
+        # snapshot's inode. If the snapshot was never swapped, its records are
+        # put back in front of the live journal; otherwise they are already in
+        # the snapshot and the file is dropped.
+        for pending in self._pending_journals():
+            if self._snapshot_inode() == int(pending.rsplit('-', 1)[1]):
+                lines = [_dumps_compact(r) + '\n' for r in self.iter_journal(pending)]
+                lines.extend(_dumps_compact(r) + '\n' for r in self.iter_journal())
+                atomic_write_text(self.journal_path, ''.join(lines))
+            os.unlink(pending)
+
+    def _load_locked(self):
+        records = self._load_snapshot()
+        records.extend(self.iter_journal())
+        return records
+
+    def _read_journal_tail(self, offset):
+        """Journal records from byte ``offset`` on, and the offset after the
+        last complete line (a torn trailing line is left for later)"""
+        try:
+            f = open(self.journal_path, 'rb')
+        except OSError:
+            return [], offset
+        with f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        records = []
+        for line in data[:end].splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records, offset + end
+
+    def _load_versioned(self):
+        """(version, records). After appends only the journal tail is parsed;
+        the snapshot is re-read only when it changed (compaction, replace)."""
+        if self._pending_journals():
+            with file_lock(self.path):
+                self._recover_locked()
+        with file_lock(self.path, shared=True), self._loaded_lock:
+            signature = file_signature(self.path, self.journal_path)
+            loaded = self._loaded
+            if loaded is not None and loaded[0] == signature:
+                return signature, loaded[1]
+            if self._only_appended(loaded and loaded[0], signature):
+                records, offset = loaded[1], loaded[2]
+            else:
+                records, offset = self._load_snapshot(), 0
+            tail, offset = self._read_journal_tail(offset)
+            if tail:
+                # A new list, so callers holding the old one see a fixed set
+                records = records + tail
+            self._loaded = (signature, records, offset)
+            return signature, records
+
+    def _load_cached(self):
+        return self._load_versioned()[1]
+
+    def load(self):
+        """All records; the list is a copy but the record dicts are shared"""
+        return list(self._load_cached())
+
+    def iter_records(self, batch_size=ITER_BATCH_SIZE):
+        """All records in append order (already in memory for this backend)"""
+        return iter(self._load_cached())
+
+    def version(self):
+        """Changes whenever the stored records change"""
+        return file_signature(self.path, self.journal_path)
+
+    def append(self, record):
+        self.append_many([record])
+
+    @staticmethod
+    def _end_torn_line(f):
+        # Never glue a new record onto a line torn by an earlier crash
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+
+    def append_many(self, records):
+        records = list(records)
+        payload = ''.join(_dumps_compact(r) + '\n' for r in records).encode('utf-8')
+        if not payload:
+            return
+        with file_lock(self.path):
+            stats = merge_stats(self._stats_locked(), build_stats(records))
+            with open(self.journal_path, 'ab+') as f:
+                self._end_torn_line(f)
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            if self.journal_size() >= self.compact_threshold:
+                self._replace_locked(self._load_locked(), stats)
+            else:
+                self._write_stats_locked(stats)
+
+    def bulk_append(self, records):
+        """Append an iterable of records as one transaction in bounded memory.
+
+        Records are streamed to a staging file first; the staged lines are
+        then copied into the journal under a single lock acquisition.
+        Returns the number of records written.
+        """
+        delta = new_stats()
+        with tempfile.TemporaryFile(dir=os.path.dirname(self.path) or '.') as staging:
+            for record in records:
+                staging.write((_dumps_compact(record) + '\n').encode('utf-8'))
+                add_record(delta, record)
+            staging.seek(0)
+            with file_lock(self.path):
+                stats = merge_stats(self._stats_locked(), delta)
+                with open(self.journal_path, 'ab+') as f:
+                    self._end_torn_line(f)
+                    shutil.copyfileobj(staging, f, COPY_CHUNK_BYTES)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._write_stats_locked(stats)
+        return delta['count']
+
+    def journal_size(self):
+        try:
+            return os.path.getsize(self.journal_path)
+        except OSError:
+            return 0
+
+    def _replace_locked(self, records, stats=None):
+        self._recover_locked()
+        pending = None
+        if os.path.exists(self.journal_path):
+            pending = f"{self.journal_path}{PENDING_MARKER}{self._snapshot_inode()}"
+            os.replace(self.journal_path, pending)
+        open(self.journal_path, 'a').close()
+        atomic_write_text(self.path, _dumps_compact(records))
+        if pending:
+            os.unlink(pending)
+        self._write_stats_locked(stats or build_stats(records))
+
+    # Aggregates are tagged with the version they describe; a mismatch (a crash
+    # between the journal and stats writes, or an edited file) triggers a rebuild
+    def _stats_locked(self):
+        stats = read_json(self.stats_path)
+        if stats and stats.get('version') == _json_value(self.version()):
+            return stats
+        return build_stats(self._load_locked())
+
+    def _write_stats_locked(self, stats):
+        atomic_write_json(self.stats_path, dict(stats, version=_json_value(self.version())), indent=None)
+
+    def stats(self):
+        """Running aggregates: count, recent ring buffer, per-day counts, GPA histogram"""
+        stats = cached_json(self.stats_path)
+        if stats and stats.get('version') == _json_value(self.version()):
+            return stats
+        with file_lock(self.path):
+            self._recover_locked()
+            stats = self._stats_locked()
+            self._write_stats_locked(stats)
+        return stats
+
+    def replace(self, records):
+        """Write ``records`` as the new snapshot and empty the journal"""
+        with file_lock(self.path):
+            self._replace_locked(list(records))
+
+
+    def _indexed(self):
+        """The name index synced to the current records, and those records"""
+        version, records = self._load_versioned()
+        with self._name_index_lock:
+            index = self._name_index
+            if index.version != version:
+                if not self._only_appended(index.version, version) or len(records) < index.size:
+                    index = self._name_index = NameIndex()
+                index.add_records(records[index.size:], index.size)
+                index.version = version
+        return index, records
+
+    # Query helpers (the SQLite backend answers the others from indexes)
+    def count(self):
+        return len(self._load_cached())
+
+    def name_index(self):
+        return self._indexed()[0]
+
+    def search_names(self, term='', mode='contains', offset=0, limit=NAME_PAGE_SIZE):
+        """One page of matching student names and the total number of matches"""
+        return self.name_index().search(term, mode, offset, limit)
+
+    def page(self, sort='timestamp', descending=True, limit=PAGE_SIZE, cursor=None, term='',
+             mode='contains'):
+        """One page of records in ``sort`` order: (records, next cursor, total).
+
+        The sorted order of the (filtered) records is kept per (sort, search)
+        in ascending order, so moving between pages only slices it and either
+        direction reads the same list. After appends only the new records are
+        inserted into it. The cursor is an opaque value from the previous
+        call; None starts at the first page.
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort records by {sort}")
+        missing = SORT_COLUMNS[sort]
+        if term:
+            index, records = self._indexed()
+            version = index.version
+        else:
+            version, records = self._load_versioned()
+
+        def matching(start):
+            if term:
+                return [p for p in index.positions(index.match(term, mode)) if p >= start]
+            return range(start, len(records))
+
+        key = (sort, term, mode)
+        with self._orders_lock:
+            memo = self._orders.get(key)
+            if memo is None or (memo[0] != version and not (
+                    self._only_appended(memo[0], version) and len(records) >= memo[1])):
+                positions = sorted(matching(0), key=lambda p: (records[p].get(sort, missing), p))
+                sort_keys = [(records[p].get(sort, missing), p) for p in positions]
+                if len(self._orders) >= MEMO_ORDERS:
+                    self._orders.pop(next(iter(self._orders)))
+                memo = self._orders[key] = [version, len(records), sort_keys, positions]
+            elif memo[0] != version:
+                _, size, sort_keys, positions = memo
+                for p in matching(size):
+                    sort_key = (records[p].get(sort, missing), p)
+                    at = bisect_right(sort_keys, sort_key)
+                    sort_keys.insert(at, sort_key)
+                    positions.insert(at, p)
+                memo[0], memo[1] = version, len(records)
+            positions = memo[3]
+            total = len(positions)
+            offset = cursor or 0
+            end = min(offset + limit, total)
+            if descending:
+                chosen = positions[max(total - end, 0):max(total - offset, 0)][::-1]
+            else:
+                chosen = positions[offset:end]
+        return [records[p] for p in chosen], (end if end < total else None), total
+
+    def records_for(self, user_name):
+        index, records = self._indexed()
+        return [records[p] for p in index.positions(index.name_ids([user_name]))]
+
+    def student_records(self, keys):
+        """Records of the given student keys, in the order they were added"""
+        index, records = self._indexed()
+        return [records[p] for p in index.student_positions(keys)]
+
+    def migrate(self):
+        """One-time conversion of a legacy indented JSON array file.
+
+        The legacy array becomes the compact snapshot and an empty journal is
+        created; the journal's existence marks the file as migrated.
+        """
+        with file_lock(self.path):
+            self._recover_locked()
+            if os.path.exists(self.journal_path):
+                return False
+            try:
+                legacy = self._load_snapshot()
+            except ValueError:
+                # Keep the unreadable file around instead of overwriting it
+                os.replace(self.path, self.path + ".corrupt")
+                legacy = []
+            self._replace_locked(legacy)
+            return True
+
+
+RECORD_COLUMNS = ('user_name', 'timestamp', 'final_gpa', 'final_cgpa',
+                  'total_credit_hours', 'total_grade_points')
+CHILD_COLUMNS = {
+    'courses': ('course_name', 'total_marks', 'obtained_marks', 'credit_hours',
+                'percentage', 'grade', 'gpa', 'grade_points'),
+    'semesters': ('semester_number', 'semester_gpa', 'credit_hours', 'grade_points'),
+}
+
+NAME_INDEX_COLUMNS = "id, user_name, json_extract(extra, '$.roll_number')"
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    user_name TEXT NOT NULL DEFAULT '',
+    timestamp TEXT NOT NULL DEFAULT '',
+    final_gpa REAL,
+    final_cgpa REAL,
+    total_credit_hours REAL,
+    total_grade_points REAL,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_records_user_name ON records(source, user_name);
+CREATE INDEX IF NOT EXISTS idx_records_timestamp ON records(source, timestamp);
+CREATE INDEX IF NOT EXISTS idx_records_final_gpa ON records(source, final_gpa);
+CREATE INDEX IF NOT EXISTS idx_records_final_cgpa ON records(source, final_cgpa);
+CREATE TABLE IF NOT EXISTS courses (
+    record_id INTEGER NOT NULL REFERENCES records(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    course_name TEXT,
+    total_marks REAL,
+    obtained_marks REAL,
+    credit_hours REAL,
+    percentage REAL,
+    grade TEXT,
+    gpa REAL,
+    grade_points REAL,
+    extra TEXT,
+    PRIMARY KEY (record_id, position)
+);
+CREATE TABLE IF NOT EXISTS semesters (
+    record_id INTEGER NOT NULL REFERENCES records(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    semester_number INTEGER,
+    semester_gpa REAL,
+    credit_hours REAL,
+    grade_points REAL,
+    extra TEXT,
+    PRIMARY KEY (record_id, position)
+);
+CREATE TABLE IF NOT EXISTS record_stats (
+    source TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+
+def _split_extra(data, columns):
+    extra = {k: v for k, v in data.items() if k not in columns}
+    return [data.get(c) for c in columns], (_dumps_compact(extra) if extra else None)
+
+
+# SQLite backend
+class SQLiteStore:
+    """Normalized SQLite record store (records, courses, semesters)"""
+
+    name = "sqlite"
+
+    def __init__(self, path, db_path=None):
+        self.path = path
+        self.source = os.path.basename(path)
+        self.db_path = db_path or os.path.join(os.path.dirname(path) or '.', SQLITE_DB_NAME)
+        self._name_index = NameIndex()
+        self._name_index_lock = threading.Lock()
+        self._name_index_max_id = 0
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(SQLITE_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        return conn
+
+    def _insert(self, conn, records):
+        delta = new_stats()
+        for record in records:
+            add_record(delta, record)
+            values, extra = _split_extra(
+                {k: v for k, v in record.items() if k not in CHILD_COLUMNS}, RECORD_COLUMNS)
+            cur = conn.execute(
+                "INSERT INTO records (source, user_name, timestamp, final_gpa, final_cgpa, "
+                "total_credit_hours, total_grade_points, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [self.source, values[0] or '', values[1] or ''] + values[2:] + [extra])
+            record_id = cur.lastrowid
+            for table, columns in CHILD_COLUMNS.items():
+                rows = []
+                for position, child in enumerate(record.get(table) or []):
+                    child_values, child_extra = _split_extra(child, columns)
+                    rows.append([record_id, position] + child_values + [child_extra])
+                if rows:
+                    placeholders = ', '.join('?' * (len(columns) + 3))
+                    conn.executemany(
+                        f"INSERT INTO {table} (record_id, position, {', '.join(columns)}, extra) "
+                        f"VALUES ({placeholders})", rows)
+        return delta
+
+    def _write_stats(self, conn, stats):
+        conn.execute("INSERT OR REPLACE INTO record_stats (source, data) VALUES (?, ?)",
+                     (self.source, _dumps_compact(stats)))
+
+    def _read_stats(self, conn):
+        row = conn.execute("SELECT data FROM record_stats WHERE source = ?", (self.source,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _fetch(self, where="", params=(), order="id", limit=None):
+        return list(self._fetch_by_id(where, params, order, limit).values())
+
+    def _fetch_by_id(self, where="", params=(), order="id", limit=None):
+        sql = (f"SELECT id, {', '.join(RECORD_COLUMNS)}, extra FROM records "
+               f"WHERE source = ? {where} ORDER BY {order}")
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, (self.source,) + tuple(params)).fetchall()
+            records = {}
+            for row in rows:
+                record = {c: v for c, v in zip(RECORD_COLUMNS, row[1:-1]) if v is not None}
+                if row[-1]:
+                    record.update(json.loads(row[-1]))
+                records[row[0]] = record
+            if records:
+                self._attach_children(conn, records)
+        return records
+
+    def _attach_children(self, conn, records):
+        ids = list(records)
+        for table, columns in CHILD_COLUMNS.items():
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT record_id, {', '.join(columns)}, extra FROM {table} "
+                    f"WHERE record_id IN ({', '.join('?' * len(chunk))}) ORDER BY record_id, position",
+                    chunk).fetchall()
+                for row in rows:
+                    child = dict(zip(columns, row[1:-1]))
+                    if row[-1]:
+                        child.update(json.loads(row[-1]))
+                    records[row[0]].setdefault(table, []).append(child)
+
+    def load(self):
+        return list(cached((self.db_path, self.source), self.version(), self._fetch))
+
+    def iter_records(self, batch_size=ITER_BATCH_SIZE):
+        """All records in id order, read ``batch_size`` at a time and not cached.
+
+        Records appended after the first batch is read are left out.
+        """
+        with closing(self._connect()) as conn:
+            last_id = conn.execute("SELECT MAX(id) FROM records WHERE source = ?",
+                                   (self.source,)).fetchone()[0]
+        after = 0
+        while last_id is not None and after < last_id:
+            batch = self._fetch_by_id("AND id > ? AND id <= ?", (after, last_id), limit=batch_size)
+            if not batch:
+                return
+            yield from batch.values()
+            after = max(batch)
+
+    def version(self):
+        return file_signature(self.db_path, self.db_path + "-wal")
+
+    def append(self, record):
+        self.append_many([record])
+
+    def append_many(self, records):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            stats = self._read_stats(conn)
+            delta = self._insert(conn, records)
+            if stats is not None:
+                self._write_stats(conn, merge_stats(stats, delta))
+        invalidate_cache(self.db_path)
+
+    def bulk_append(self, records):
+        """Insert an iterable of records in one SQLite transaction"""
+        counter = [0]
+
+        def counted():
+            for record in records:
+                counter[0] += 1
+                yield record
+
+        self.append_many(counted())
+        return counter[0]
+
+    def replace(self, records):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM records WHERE source = ?", (self.source,))
+            self._write_stats(conn, self._insert(conn, records))
+        invalidate_cache(self.db_path)
+
+    def count(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM records WHERE source = ?",
+                                (self.source,)).fetchone()[0]
+
+    def stats(self):
+        """Running aggregates, kept in the same transaction as the records"""
+        with closing(self._connect()) as conn:
+            stats = self._read_stats(conn)
+        if stats is None:
+            # Databases created before the aggregates existed
+            with closing(self._connect()) as conn, conn:
+                conn.execute("BEGIN IMMEDIATE")
+                stats = self._read_stats(conn)
+                if stats is None:
+                    stats = build_stats(self._fetch())
+                    self._write_stats(conn, stats)
+        return stats
+
+    def name_index(self):
+        """The name index (positions are record ids) synced to the database"""
+        version = self.version()
+        with self._name_index_lock:
+            index = self._name_index
+            if index.version == version:
+                return index
+            with closing(self._connect()) as conn:
+                rows = conn.execute(f"SELECT {NAME_INDEX_COLUMNS} FROM records WHERE source = ? "
+                                    "AND id > ? ORDER BY id",
+                                    (self.source, self._name_index_max_id)).fetchall()
+                count = conn.execute("SELECT COUNT(*) FROM records WHERE source = ?",
+                                     (self.source,)).fetchone()[0]
+                if index.size + len(rows) != count:
+                    # Records were replaced or deleted: start over
+                    index = self._name_index = NameIndex()
+                    rows = conn.execute(f"SELECT {NAME_INDEX_COLUMNS} FROM records WHERE source = ? "
+                                        "ORDER BY id", (self.source,)).fetchall()
+            index.add_names((user_name, record_id, roll) for record_id, user_name, roll in rows)
+            if rows:
+                self._name_index_max_id = rows[-1][0]
+            elif not index.size:
+                self._name_index_max_id = 0
+            index.version = version
+            return index
+
+    def search_names(self, term='', mode='contains', offset=0, limit=NAME_PAGE_SIZE):
+        return self.name_index().search(term, mode, offset, limit)
+
+    def page(self, sort='timestamp', descending=True, limit=PAGE_SIZE, cursor=None, term='',
+             mode='contains'):
+        """One page of records in ``sort`` order: (records, next cursor, total).
+
+        Pages are read with keyset pagination on the (source, column) indexes:
+        the cursor is the (value, id) of the last row of the previous page,
+        so every page costs the same however deep it is.
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort records by {sort}")
+        missing = SORT_COLUMNS[sort]
+        where, params = "", []
+        if term:
+            index = self.name_index()
+            where += " AND id IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps(index.positions(index.match(term, mode))))
+        count_where, count_params = where, list(params)
+        if cursor is not None:
+            where += f" AND ({sort}, id) {'<' if descending else '>'} (?, ?)"
+            params += list(cursor)
+        direction = "DESC" if descending else "ASC"
+        # One extra row tells whether there is a next page
+        records = self._fetch_by_id(where, params, f"{sort} {direction}, id {direction}", limit + 1)
+
+        def count():
+            with closing(self._connect()) as conn:
+                return conn.execute(f"SELECT COUNT(*) FROM records WHERE source = ? {count_where}",
+                                    [self.source] + count_params).fetchone()[0]
+
+        total = cached((self.db_path, self.source, 'page_count', term, mode), self.version(), count)
+        page = list(records.items())[:limit]
+        next_cursor = None
+        if len(records) > limit:
+            last_id, last = page[-1]
+            next_cursor = (last.get(sort, missing), last_id)
+        return [record for _, record in page], next_cursor, total
+
+    def records_for(self, user_name):
+        return self._fetch("AND user_name = ?", (user_name,))
+
+    def student_records(self, keys):
+        index = self.name_index()
+        return self._fetch("AND id IN (SELECT value FROM json_each(?))",
+                           (json.dumps(index.student_positions(keys)),))
+
+    def import_json(self, path=None):
+        """Import records from a JSON array / journal file pair"""
+        records = JournalStore(path or self.path).load()
+        self.append_many(records)
+        return len(records)
+
+    def migrate(self):
+        # Import the existing data/*.json records (snapshot, journal or both)
+        # the first time this source is used
+        legacy = JournalStore(self.path)
+        if self.count() or not (os.path.exists(legacy.path) or os.path.exists(legacy.journal_path)):
+            return False
+        self.import_json()
+        return True
+
+
+STORAGE_BACKENDS = {
+    "journal": JournalStore,
+    "sqlite": SQLiteStore,
+}
+
+_stores = {}
+
+
+# Get the record store for a file using the configured backend
+def get_record_store(path, backend=None):
+    backend = backend or os.environ.get("SMIU_STORAGE_BACKEND", DEFAULT_BACKEND)
+    key = (backend, path)
+    if key not in _stores:
+        if backend not in STORAGE_BACKENDS:
+            raise ValueError(f"Unknown storage backend: {backend}")
+        _stores[key] = STORAGE_BACKENDS[backend](path)
+    return _stores[key]
@@ -0,0 +1,87 @@
+"""Student identities across the GPA and CGPA records.
+
+Every record belongs to a student key (see ``name_index.student_key``): the
+roll number when one was entered, otherwise the name with case, accents and
+punctuation normalized away. Keys that still refer to the same person
+("m moiz" and "muhammad moiz") are merged by an alias file mapping a key to
+the key it was merged into, so no stored record is rewritten.
+"""
+from storage import cached_json, transaction
+
+
+# Alias map: merged student key -> key it now belongs to
+def load_aliases(alias_file):
+    return cached_json(alias_file, {})
+
+
+def canonical_key(key, aliases):
+    seen = set()
+    while key in aliases and key not in seen:
+        seen.add(key)
+        key = aliases[key]
+    return key
+
+
+def merge_students(alias_file, keys, into):
+    """Merge the student ``keys`` into the student ``into``"""
+    with transaction(alias_file, {}) as aliases:
+        target = canonical_key(into, aliases)
+        for key in keys:
+            if canonical_key(key, aliases) != target:
+                aliases[canonical_key(key, aliases)] = target
+
+
+def unmerge_student(alias_file, key):
+    with transaction(alias_file, {}) as aliases:
+        aliases.pop(key, None)
+
+
+def student_directory(indexes, aliases):
+    """Students by canonical key: name, member keys and record counts per kind.
+
+    ``indexes`` maps a kind ('GPA', 'CGPA') to the name index of its store.
+    """
+    directory = {}
+    for kind, index in indexes.items():
+        for key, user_name, count in index.students():
+            entry = directory.setdefault(canonical_key(key, aliases),
+                                         {'name': user_name, 'keys': set(), 'GPA': 0, 'CGPA': 0})
+            entry['keys'].add(key)
+            entry[kind] += count
+    return directory
+
+
+def _name_words(key):
+    return key.split(':', 1)[1].split() if key.startswith('name:') else None
+
+
+# "m moiz" ~ "muhammad moiz": same last word, every other word a prefix of its counterpart
+def _same_person(a, b):
+    if len(a) != len(b) or a[-1] != b[-1]:
+        return ''.join(a) == ''.join(b)
+    return all(x.startswith(y) or y.startswith(x) for x, y in zip(a[:-1], b[:-1]))
+
+
+def duplicate_pairs(directory):
+    """Pairs of canonical keys whose names probably belong to one student.
+
+    Only direct matches are paired: "m moiz" pairs with both "muhammad moiz"
+    and "maria moiz", but those two are not paired with each other, so a
+    pair is never a chain of guesses.
+    """
+    # Only names sharing a bucket are compared
+    buckets = {}
+    for key in directory:
+        words = _name_words(key)
+        if words:
+            buckets.setdefault((words[-1], words[0][0], len(words)), []).append(key)
+            buckets.setdefault(''.join(words), []).append(key)
+
+    pairs = set()
+    for keys in buckets.values():
+        keys.sort()
+        for i, a in enumerate(keys):
+            for b in keys[i + 1:]:
+                if (a, b) not in pairs and _same_person(_name_words(a), _name_words(b)):
+                    pairs.add((a, b))
+    return sorted(pairs)
@@ -0,0 +1,149 @@
+"""Admission control and write coalescing for student submissions.
+
+A shared class link can bring hundreds of "Calculate" clicks within a
+minute. Two things keep that burst from turning into hundreds of separate
+locked, fsynced appends:
+
+* ``KeyedLimiter`` holds one token bucket per key (short code, session).
+  A save that finds its bucket empty is shed: the student still sees the
+  result, it is just not stored.
+* ``WriteQueue`` is a group commit in front of a record store. Whoever
+  submits while no flush is running writes everything queued so far with
+  one ``append_many``; submissions arriving meanwhile wait and go out
+  together in the next flush. ``submit`` returns once the record is on
+  disk, so nothing is acknowledged that a crash could lose.
+
+Both are per process; the record store's file lock still orders writers
+across processes.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+MAX_LIMITER_KEYS = 10000
+
+
+class TokenBucket:
+    """``capacity`` tokens, refilled at ``rate`` tokens per second"""
+
+    def __init__(self, rate, capacity, now=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def try_acquire(self, now=None):
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class KeyedLimiter:
+    """A token bucket per key; the least recently used keys are dropped
+    past ``max_keys`` (a dropped key starts again with a full bucket)."""
+
+    def __init__(self, rate, capacity, max_keys=MAX_LIMITER_KEYS):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.shed = 0
+
+    def try_acquire(self, key, now=None):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity, now)
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            if bucket.try_acquire(now):
+                self.allowed += 1
+                return True
+            self.shed += 1
+            return False
+
+
+class _Batch:
+    def __init__(self):
+        self.records = []
+        self.done = False
+        self.error = None
+
+
+class WriteQueue:
+    """Group commit of single-record appends to ``store``"""
+
+    def __init__(self, store):
+        self.store = store
+        self._cond = threading.Condition()
+        self._open = _Batch()
+        self._flushing = False
+        self._metrics = {"depth": 0, "max_depth": 0, "flushes": 0, "records": 0,
+                         "last_flush_ms": 0.0, "max_flush_ms": 0.0, "total_flush_ms": 0.0}
+
+    def submit(self, record):
+        """Queue ``record`` and return once it is written (or raise its error)"""
+        with self._cond:
+            batch = self._open
+            batch.records.append(record)
+            self._metrics["depth"] += 1
+            self._metrics["max_depth"] = max(self._metrics["max_depth"], self._metrics["depth"])
+            while not batch.done:
+                if not self._flushing:
+                    self._flush_open()
+                else:
+                    self._cond.wait()
+            if batch.error is not None:
+                raise batch.error
+
+    # Called with the condition held; writes the open batch without it
+    def _flush_open(self):
+        batch, self._open = self._open, _Batch()
+        self._flushing = True
+        self._metrics["depth"] -= len(batch.records)
+        self._cond.release()
+        started = time.perf_counter()
+        try:
+            self.store.append_many(batch.records)
+        except BaseException as e:  # handed to every submitter of the batch
+            batch.error = e
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._cond.acquire()
+        batch.done = True
+        self._flushing = False
+        metrics = self._metrics
+        metrics["flushes"] += 1
+        metrics["records"] += len(batch.records)
+        metrics["last_flush_ms"] = elapsed_ms
+        metrics["max_flush_ms"] = max(metrics["max_flush_ms"], elapsed_ms)
+        metrics["total_flush_ms"] += elapsed_ms
+        self._cond.notify_all()
+
+    def metrics(self):
+        with self._cond:
+            metrics = dict(self._metrics)
+        flushes = metrics["flushes"]
+        metrics["mean_batch"] = metrics["records"] / flushes if flushes else 0.0
+        metrics["mean_flush_ms"] = metrics["total_flush_ms"] / flushes if flushes else 0.0
+        return metrics
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_write_queue(store):
+    """The process-wide write queue in front of ``store``"""
+    with _queues_lock:
+        if store not in _queues:
+            _queues[store] = WriteQueue(store)
+        return _queues[store]
@@ -0,0 +1,342 @@
+"""Short URL history as rotating, size-capped segment files.
+
+History entries used to be a list inside ``url_shortener.json``, so every
+admin action and page load read and rewrote all of them. They now live in a
+directory of JSON-Lines segments:
+
+    data/url_history/
+        index.json         live segment name and the sealed segments (oldest
+                           first) with their entry count, first/last
+                           timestamp and entry count per (action, user)
+        000001.jsonl.gz    sealed segments, gzip-compressed
+        000002.jsonl       the live segment; appends only touch this file
+
+Once the live segment passes ``segment_bytes`` it is sealed and a new one is
+started; only then is the index rewritten. Entries are appended in time
+order, so every segment is a time bucket and newest first is reverse append
+order; nothing is sorted at read time.
+
+Filtered views come from secondary indexes rather than scans: the
+per-segment (action, user) counts give the total of any filter and tell
+which segments hold the requested page, and a segment that is read keeps
+the positions of its entries per (action, user). The live segment's
+positions are extended with each appended line instead of being rebuilt.
+"""
+import gzip
+import heapq
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime
+
+from storage import atomic_write_json, cached, file_lock, file_signature, invalidate_cache, read_json
+
+INDEX_NAME = "index.json"
+SEGMENT_BYTES = 256 * 1024
+SEGMENT_CACHE_SIZE = 8
+PAGE_SIZE = 100
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _dumps_compact(entry):
+    return json.dumps(entry, separators=(',', ':'), ensure_ascii=False)
+
+
+def _parse_lines(lines):
+    entries = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entries.append(json.loads(line))
+        except ValueError:  # torn line from a crash
+            continue
+    return entries
+
+
+# Secondary index key of an entry
+def _group(entry):
+    return f"{entry.get('action', '')}\t{entry.get('by', 'Unknown')}"
+
+
+def _group_matches(group, action=None, user=None):
+    group_action, group_user = group.split('\t', 1)
+    return (action is None or group_action == action) and (user is None or group_user == user)
+
+
+def _matching_count(meta, action=None, user=None):
+    return sum(n for group, n in meta["groups"].items() if _group_matches(group, action, user))
+
+
+class SegmentIndex:
+    """One segment's entries and their positions per (action, user)"""
+
+    def __init__(self, entries=()):
+        self.entries = []
+        self.groups = {}  # group -> ascending entry positions
+        self.add(entries)
+
+    def add(self, entries):
+        for entry in entries:
+            self.groups.setdefault(_group(entry), []).append(len(self.entries))
+            self.entries.append(entry)
+
+    def meta(self, name):
+        return {
+            "name": name,
+            "count": len(self.entries),
+            "first": self.entries[0].get("timestamp", "") if self.entries else "",
+            "last": self.entries[-1].get("timestamp", "") if self.entries else "",
+            "groups": {group: len(positions) for group, positions in self.groups.items()},
+        }
+
+    def positions(self, action=None, user=None, since=None, until=None):
+        """Ascending positions of the matching entries"""
+        lists = [p for group, p in self.groups.items() if _group_matches(group, action, user)]
+        positions = list(heapq.merge(*lists)) if len(lists) > 1 else list(lists[0] if lists else ())
+        if since or until:
+            def timestamp(p):
+                return self.entries[p].get("timestamp", "")
+            start = bisect_left(positions, since, key=timestamp) if since else 0
+            end = bisect_right(positions, until, key=timestamp) if until else len(positions)
+            positions = positions[start:end]
+        return positions
+
+
+class HistoryLog:
+    """Append-only URL history in rotating segments (see module docstring)"""
+
+    def __init__(self, directory, segment_bytes=SEGMENT_BYTES, compress=True):
+        self.directory = directory
+        self.index_path = os.path.join(directory, INDEX_NAME)
+        self.segment_bytes = segment_bytes
+        self.compress = compress
+        self._sealed_cache = OrderedDict()  # segment name -> SegmentIndex, most recent last
+        self._sealed_lock = threading.Lock()
+        self._live = None  # (segment name, bytes indexed, SegmentIndex)
+        self._live_lock = threading.RLock()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _index(self):
+        index = cached(self.index_path, file_signature(self.index_path),
+                       lambda: read_json(self.index_path, None))
+        return index or {"live": "000001.jsonl", "next": 2, "segments": []}
+
+    def _live_index(self, name):
+        """The live segment's index, extended with the lines appended since the last call.
+
+        Hold ``_live_lock`` while using the result.
+        """
+        path = self._path(name)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            size = 0
+        if self._live is None or self._live[0] != name or size < self._live[1]:
+            self._live = (name, 0, SegmentIndex())
+        _, offset, index = self._live
+        if size > offset:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read(size - offset)
+            end = data.rfind(b'\n') + 1  # a line still being written is picked up next time
+            index.add(_parse_lines(data[:end].decode('utf-8').splitlines()))
+            self._live = (name, offset + end, index)
+        return index
+
+    def _sealed_index(self, name):
+        # Sealed segments never change, so a small LRU of parsed ones is enough
+        with self._sealed_lock:
+            if name in self._sealed_cache:
+                self._sealed_cache.move_to_end(name)
+                return self._sealed_cache[name]
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(self._path(name), 'rt', encoding='utf-8') as f:
+            index = SegmentIndex(_parse_lines(f))
+        with self._sealed_lock:
+            self._sealed_cache[name] = index
+            if len(self._sealed_cache) > SEGMENT_CACHE_SIZE:
+                self._sealed_cache.popitem(last=False)
+        return index
+
+    def segments(self):
+        """Segment metadata, newest first (the live segment included)"""
+        index = self._index()
+        with self._live_lock:
+            live_meta = self._live_index(index["live"]).meta(index["live"])
+        sealed = [meta if "groups" in meta else self._sealed_index(meta["name"]).meta(meta["name"])
+                  for meta in reversed(index["segments"])]  # indexes written before the counts existed
+        return [dict(live_meta, live=True)] + sealed
+
+    def _matching(self, meta, action=None, user=None, since=None, until=None):
+        """A segment's entries and the ascending positions of the matching ones"""
+        if meta.get("live"):
+            with self._live_lock:
+                index = self._live_index(meta["name"])
+                return index.entries, index.positions(action, user, since, until)
+        index = self._sealed_index(meta["name"])
+        return index.entries, index.positions(action, user, since, until)
+
+    def append(self, entries):
+        """Append entries; a large batch is split so no segment passes the size cap"""
+        lines = [(_dumps_compact(e) + '\n').encode('utf-8') for e in entries]
+        if not lines:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with file_lock(self.index_path):
+            index = self._index()
+            try:
+                size = os.path.getsize(self._path(index["live"]))
+            except FileNotFoundError:
+                size = 0
+            chunk = []
+            for line in lines:
+                chunk.append(line)
+                size += len(line)
+                if size >= self.segment_bytes:
+                    self._write_live_locked(index, chunk)
+                    index = self._seal_locked(index)
+                    chunk, size = [], 0
+            if chunk:
+                self._write_live_locked(index, chunk)
+
+    def _write_live_locked(self, index, lines):
+        live_path = self._path(index["live"])
+        with open(live_path, 'ab+') as f:
+            # Never glue an entry onto a line torn by an earlier crash
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+            f.write(b''.join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        invalidate_cache(live_path)
+
+    def _seal_locked(self, index):
+        """Compress the live segment, start a new one; returns the new index"""
+        live = index["live"]
+        name = live + '.gz' if self.compress else live
+        with self._live_lock:
+            segment = self._live_index(live)
+            if self.compress:
+                tmp_path = self._path(name + '.tmp')
+                with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                    f.writelines(_dumps_compact(e) + '\n' for e in segment.entries)
+                os.replace(tmp_path, self._path(name))
+        with self._sealed_lock:
+            self._sealed_cache[name] = segment
+        index = {
+            "live": f"{index['next']:06d}.jsonl",
+            "next": index["next"] + 1,
+            "segments": index["segments"] + [segment.meta(name)],
+        }
+        atomic_write_json(self.index_path, index, indent=None)
+        if self.compress:
+            os.unlink(self._path(live))
+            invalidate_cache(self._path(live))
+        return index
+
+    # Counts and dropdown values come from the index alone
+    def count(self, action=None, user=None):
+        return sum(_matching_count(meta, action, user) for meta in self.segments())
+
+    def _group_values(self, part):
+        return sorted({group.split('\t', 1)[part] for meta in self.segments() for group in meta["groups"]})
+
+    def actions(self):
+        return self._group_values(0)
+
+    def users(self):
+        return self._group_values(1)
+
+    def _in_range(self, meta, since=None, until=None):
+        return not ((since and meta["last"] and meta["last"] < since) or
+                    (until and meta["first"] and meta["first"] > until))
+
+    def page(self, action=None, user=None, since=None, until=None, offset=0, limit=PAGE_SIZE):
+        """One page of matching entries, newest first, and the total number of matches.
+
+        ``since``/``until`` are inclusive timestamp strings. Only segments
+        holding part of the page, or straddling a time bound, are read.
+        """
+        entries, total = [], 0
+        for meta in self.segments():
+            if not self._in_range(meta, since, until):
+                continue
+            if (not since or meta["first"] >= since) and (not until or meta["last"] <= until):
+                n = _matching_count(meta, action, user)
+                if not n or total + n <= offset or len(entries) >= limit:
+                    total += n
+                    continue
+            segment_entries, positions = self._matching(meta, action, user, since, until)
+            end = len(positions) - max(offset - total, 0)
+            for p in reversed(positions[max(end - (limit - len(entries)), 0):max(end, 0)]):
+                entries.append(segment_entries[p])
+            total += len(positions)
+        return entries, total
+
+    def iter_entries(self, action=None, user=None, since=None, until=None):
+        """Every matching entry, newest first; segments are read one at a time"""
+        for meta in self.segments():
+            if not self._in_range(meta, since, until) or not _matching_count(meta, action, user):
+                continue
+            segment_entries, positions = self._matching(meta, action, user, since, until)
+            for p in reversed(positions):
+                yield segment_entries[p]
+
+    def clear(self, by):
+        """Delete all history, leaving one ``history_cleared`` entry; returns the number deleted"""
+        os.makedirs(self.directory, exist_ok=True)
+        with file_lock(self.index_path):
+            segments = self.segments()
+            deleted = sum(meta["count"] for meta in segments)
+            index = self._index()
+            entry = {
+                "timestamp": datetime.now().strftime(TIMESTAMP_FORMAT),
+                "action": "history_cleared",
+                "records_deleted": deleted,
+                "by": by,
+            }
+            live = f"{index['next']:06d}.jsonl"
+            with open(self._path(live), 'w', encoding='utf-8') as f:
+                f.write(_dumps_compact(entry) + '\n')
+            atomic_write_json(self.index_path, {"live": live, "next": index["next"] + 1,
+                                                "segments": []}, indent=None)
+            for meta in segments:
+                try:
+                    os.unlink(self._path(meta["name"]))
+                except FileNotFoundError:
+                    pass
+                invalidate_cache(self._path(meta["name"]))
+            with self._sealed_lock:
+                self._sealed_cache.clear()
+        return deleted
+
+
+_logs = {}
+
+
+def get_history_log(directory):
+    if directory not in _logs:
+        _logs[directory] = HistoryLog(directory)
+    return _logs[directory]
+
+
+def migrate_url_history(url_file, log):
+    """Move a ``url_history`` list out of the URL shortener file into ``log``"""
+    with file_lock(url_file):
+        url_data = read_json(url_file, {})
+        if "url_history" not in url_data:
+            return
+        # A migration interrupted after the append already moved the entries
+        if not log.count():
+            # Segments are time buckets, so go in time order
+            log.append(sorted(url_data["url_history"], key=lambda e: e.get("timestamp", "")))
+        del url_data["url_history"]
+        atomic_write_json(url_file, url_data)